@@ -1,9 +1,21 @@
-from pulp import *
-import coinor.dippy as dippy
+from pulp import (LpAffineExpression, LpBinary, LpInteger, LpStatusInfeasible, LpStatusOptimal, LpVariable, lpSum,
+                  value)
 
-from math import floor, ceil
-import matplotlib.pyplot as plt
-from veh_rout_prob import FIGSIZE, get_graphs, get_subtour
+import sys
+import time
+from math import ceil
+
+import numpy as np
+
+from veh_rout_prob import (FIGSIZE, get_cutsets, get_capacity_sets, get_infeasible_paths, get_neighbour_arcs,
+                           get_arc_prices, get_arc_layout, get_subtours, path_is_late, window_arrays)
+from veh_rout_pricing import shortest_routes
+from veh_rout_pre import capacity_arcs, distcap_arcs, fleet_bound, window_arcs
+from veh_rout_cache import fingerprint
+from veh_rout_cbc import CbcProblem, solve_cbc
+from veh_rout_heur import (LocalSearch, repair_routes, round_routes, route_arcs, route_length, route_load,
+                           route_times, savings)
+from veh_rout_stats import STATS, TRACE, CallbackStats, instrumented
 
 tol = pow(pow(2, -20), 2.0 / 3.0)
 myopts = {
@@ -11,64 +23,229 @@ myopts = {
     "Interval": 1000,
 }
 
+# Dippy is imported when the first problem is formulated, see load_dippy
+dippy = None
 
-# Formulate the IP and necessary constraints
-def formulate(vrp, options={}):
-    prob = dippy.DipProblem("VRP",
-                            # display_mode='matplotlib',
-                            display_mode='none',
-                            display_interval=10)
 
-    assign_vars = LpVariable.dicts("y",
-                                   [(i, j, k) for i in vrp.EXTLOCS
-                                    for j in vrp.EXTLOCS
-                                    for k in vrp.VEHS
-                                    if i != j],
-                                   cat=LpBinary)
+# Import Dippy, keeping it off any window system unless Dippy is to display its tree
+def load_dippy(display=False):
+    global dippy
+    if dippy is None:
+        if display or "matplotlib.pyplot" in sys.modules:
+            import coinor.dippy
+        else:
+            # gimpy, which Dippy draws the tree with, imports matplotlib.pyplot whenever it is installed, so
+            # the non-interactive Agg backend is chosen for the import alone and the setting put back after it.
+            # pyplot only picks its backend once it draws, so the caller's own plotting is left as it was
+            try:
+                import matplotlib
+            except ImportError:
+                import coinor.dippy
+            else:
+                backend = dict.__getitem__(matplotlib.rcParams, "backend")
+                matplotlib.use("Agg")
+                try:
+                    import coinor.dippy
+                finally:
+                    dict.__setitem__(matplotlib.rcParams, "backend", backend)
+        dippy = coinor.dippy
+    return dippy
+
+
+# The solver backends, chosen with the Backend option: the DipProblem-like class formulate builds the model
+# as, and the function solve hands it to, which returns (status, message, primals, duals) as dippy.Solve does
+BACKENDS = ("Dippy", "CBC")
+
+
+def load_backend(name, display=False):
+    if name == "CBC":
+        return CbcProblem, solve_cbc
+    elif name == "Dippy":
+        load_dippy(display)
+        return dippy.DipProblem, solve_dippy
+    raise Exception("Unknown backend " + repr(name) + ", the backends are " + ", ".join(BACKENDS))
+
+
+# Formulate the IP and necessary constraints, over the given arcs or every arc allowed by the options,
+# taking over the arc variables of an earlier model of the same formulation if one is given to reuse
+def formulate(vrp, options={}, arcs=None, reuse=None):
+    # Headless unless a display mode, e.g. 'matplotlib', is asked for
+    display_mode = options.get("Display", "none")
+    backend = options.get("Backend", "Dippy")
+    problem, _ = load_backend(backend, display_mode != "none")
+    prob = problem("VRP",
+                   display_mode=display_mode,
+                   display_interval=10)
+    prob.backend = backend
+    # Report what preprocessing finds unless instrumentation is off, solve starts a record of its own
+    prob.stats = CallbackStats(options.get("Stats", STATS))
+
+    if "Tol" in options:
+        prob.tol = options["Tol"]
+    else:
+        prob.tol = pow(pow(2, -24), 2.0 / 3.0)
+
+    # Attach the problem data to the DipProblem
+    prob.vrp = vrp
+
+    # Every ordered pair of locations, less the arcs no route within the distance cap, capacity or time
+    # windows can use
+    allowed = [(i, j) for i in vrp.EXTLOCS for j in vrp.EXTLOCS if i != j]
+    prob.infeasible = False
+    # Routes solve starts from and cuts carried over from an earlier model, set by reoptimize
+    prob.start_routes = None
+    prob.pool_cuts = []
+    prob.pool_keys = set()
+    prob.pre_stats = {"Removed": 0, "Variables": 0, "Unreachable": [], "Overloaded": [], "Late": [],
+                      "FleetBound": 0}
+    # The time windows as tightened by preprocessing, and the start of service variables
+    prob.windows = None
+    prob.time_vars = {}
+    if vrp.distcap is not None:
+        allowed, report = distcap_arcs(vrp, allowed)
+        prob.pre_stats.update(report)
+        prob.pre_stats["Variables"] = prob.pre_stats["Removed"] * len(vrp.VEHS)
+        prob.stats.report("Distance cap preprocessing removed", prob.pre_stats["Removed"], "arcs and",
+                          prob.pre_stats["Variables"], "variables")
+        if len(prob.pre_stats["Unreachable"]) > 0:
+            prob.infeasible = True
+            prob.stats.report("Infeasible: the round trips from the depot to customers",
+                              prob.pre_stats["Unreachable"], "are longer than the distance cap of", vrp.distcap)
+    if vrp.capacity is not None:
+        allowed, report = capacity_arcs(vrp, allowed)
+        prob.pre_stats["Removed"] += report["Removed"]
+        prob.pre_stats["Variables"] += report["Removed"] * len(vrp.VEHS)
+        prob.pre_stats["Overloaded"] = report["Overloaded"]
+        prob.stats.report("Capacity preprocessing removed", report["Removed"], "arcs and",
+                          report["Removed"] * len(vrp.VEHS), "variables")
+        if len(report["Overloaded"]) > 0:
+            prob.infeasible = True
+            prob.stats.report("Infeasible: the demands of customers", report["Overloaded"],
+                              "are more than the capacity of", vrp.capacity)
+    if vrp.windows is not None:
+        allowed, report = window_arcs(vrp, allowed)
+        prob.pre_stats["Removed"] += report["Removed"]
+        prob.pre_stats["Variables"] += report["Removed"] * len(vrp.VEHS)
+        prob.pre_stats["Late"] = report["Late"]
+        prob.windows = report["Windows"]
+        prob.stats.report("Time window preprocessing removed", report["Removed"], "arcs and",
+                          report["Removed"] * len(vrp.VEHS), "variables")
+        if len(report["Late"]) > 0:
+            prob.infeasible = True
+            prob.stats.report("Infeasible: customers", report["Late"], "can't be served within their time windows")
+
+    # Fewest vehicles any solution needs, rejecting the problem outright if the fleet is too small
+    if not prob.infeasible:
+        bound, reason = fleet_bound(vrp, allowed)
+        prob.pre_stats["FleetBound"] = bound
+        if reason is not None:
+            prob.infeasible = True
+            prob.stats.report("Infeasible:", reason)
+
+    # The arcs in the model, every allowed arc unless pruned to the nearest neighbours of each customer
+    if arcs is None and "Neighbours" in options:
+        arcs = get_neighbour_arcs(vrp, options["Neighbours"])
+    if arcs is None:
+        arcs = allowed
+    else:
+        keep = set(allowed)
+        arcs = [arc for arc in arcs if arc in keep]
+    # The arc positions into and out of each location, and the length of each arc, worked out once
+    # so the constraints are built straight from them
+    into_arcs = dict([(j, []) for j in vrp.EXTLOCS])
+    outof_arcs = dict([(i, []) for i in vrp.EXTLOCS])
+    for a, (i, j) in enumerate(arcs):
+        into_arcs[j].append(a)
+        outof_arcs[i].append(a)
+    dists = get_arc_dists(vrp, arcs)
+    prob.arcs = arcs
+    prob.allowed = allowed
+    prob.pruned = len(arcs) < len(allowed)
+    # Kept so that solve can rebuild the model if pruned arcs have to be put back
+    prob.formulate_options = options
+    # Subtours are cut off by the callbacks, or by MTZ or flow constraints in the model itself
+    prob.subtours = options.get("Subtours", "Cuts")
+
+    # Nothing to build once preprocessing has proved the problem infeasible
+    if prob.infeasible:
+        prob.formulation = "ThreeIndex"
+        prob.assign_vars = {}
+        prob.use_vars = {}
+        prob.arc_vars = {}
+        set_arc_layout(prob)
+        return prob
+
+    # Identical vehicles with no distance cap don't need to be told apart in the model
+    if options.get("Formulation") == "TwoIndex":
+        if vrp.distcap is None:
+            old = {}
+            if reuse is not None and reuse.formulation == "TwoIndex":
+                old = dict([((i, j), var) for (i, j, k), var in reuse.arc_vars.items()])
+            formulate_two_index(prob, vrp, arcs, into_arcs, outof_arcs, dists, old)
+            set_arc_layout(prob)
+            formulate_compact(prob, vrp)
+            formulate_windows(prob, vrp)
+            return prob
+        prob.stats.report("The two-index formulation can't cap route distances, using the three-index formulation")
+
+    assign_vars = get_arc_vars("y",
+                               [(i, j, k) for (i, j) in arcs
+                                for k in vrp.VEHS],
+                               reuse.arc_vars if reuse is not None else {})
     use_vars = LpVariable.dicts("x", vrp.VEHS, cat=LpBinary)
 
+    # The vehicles are identical, so those the fleet bound says are needed can be the first ones
+    for k in vrp.VEHS[:prob.pre_stats["FleetBound"]]:
+        use_vars[k].lowBound = 1
+
+    # Each vehicle's arc variables, in the order of arcs
+    veh_vars = dict([(k, [assign_vars[i, j, k] for (i, j) in arcs]) for k in vrp.VEHS])
+
     # Objective function: minimise the distance between nodes * whether that arc is used by any vehicle.
-    prob += lpSum(vrp.dist[i, j] * assign_vars[i, j, k]
-                  for i in vrp.EXTLOCS
-                  for j in vrp.EXTLOCS
-                  for k in vrp.VEHS
-                  if i != j), "min_dist"
+    prob += LpAffineExpression([(var, d)
+                                for k in vrp.VEHS
+                                for var, d in zip(veh_vars[k], dists)]), "min_dist"
 
     # Each node (excluding 'O') must have one arc entering from any other node (including 'O')
     for j in vrp.LOCS:
-        prob += lpSum(assign_vars[i, j, k]
-                      for i in vrp.EXTLOCS
-                      for k in vrp.VEHS
-                      if i != j) == 1
+        prob += LpAffineExpression([(veh_vars[k][a], 1)
+                                    for a in into_arcs[j]
+                                    for k in vrp.VEHS]) == 1
 
     # Each node (excluding 'O') must have one arc leaving to any other node (including 'O')
     for i in vrp.LOCS:
-        prob += lpSum(assign_vars[i, j, k]
-                      for j in vrp.EXTLOCS
-                      for k in vrp.VEHS
-                      if j != i) == 1
+        prob += LpAffineExpression([(veh_vars[k][a], 1)
+                                    for a in outof_arcs[i]
+                                    for k in vrp.VEHS]) == 1
+
+    # In the decomposition mode each vehicle's own constraints form a relaxation block and only the
+    # customer assignment constraints stay in the master
+    decomp = options.get("Decomp", False)
+    if decomp and backend != "Dippy":
+        prob.stats.report("Only Dippy can decompose the problem, using the compact formulation")
+        decomp = False
 
     for k in vrp.VEHS:
+        block = prob.relaxation[k] if decomp else prob
+        kVars = veh_vars[k]
+
         # Conservation of flows
         # If an arc enters a certain node j from any other node, then there must be
         # an arc leaving j to any other node.
         for j in vrp.LOCS:
-            prob += lpSum(assign_vars[i_1, j, k]
-                          for i_1 in vrp.EXTLOCS
-                          if i_1 != j) == lpSum(assign_vars[j, i_2, k]
-                                                for i_2 in vrp.EXTLOCS
-                                                if i_2 != j)
+            block += LpAffineExpression([(kVars[a], 1) for a in into_arcs[j]] +
+                                        [(kVars[a], -1) for a in outof_arcs[j]]) == 0
 
         # If all ncurr vehicles specified in the veh_rout_cart[i].py are to be used
         if vrp.allused:
 
             # Specify that all vehicles must enter the depot
-            prob += lpSum(assign_vars[i, 'O', k]
-                          for i in vrp.LOCS) == 1
+            block += LpAffineExpression([(kVars[a], 1)
+                                         for a in into_arcs['O']]) == 1
 
             # Specify all vehicles must leave the depot
-            prob += lpSum(assign_vars['O', j, k]
-                          for j in vrp.LOCS) == 1
+            block += LpAffineExpression([(kVars[a], 1)
+                                         for a in outof_arcs['O']]) == 1
 
         else:
 
@@ -78,8 +255,9 @@ def formulate(vrp, options={}):
             #               for i in vrp.LOCS) == use_vars[k]
 
             # Specify that if a vehicle is used it must leave the depot
-            prob += lpSum(assign_vars['O', j, k]
-                          for j in vrp.LOCS) == use_vars[k]
+            block += LpAffineExpression([(kVars[a], 1)
+                                         for a in outof_arcs['O']] +
+                                        [(use_vars[k], -1)]) == 0
 
         # Condition for checking if the route taken by each vehicle does not exceed the allowed maximum
         # journey distance
@@ -87,51 +265,391 @@ def formulate(vrp, options={}):
 
             # For each vehicle k, ensure that the maximum distance travelled is less than the distance
             # capacity and 0 if that vehicle is not used.
-            prob += lpSum(vrp.dist[i, j] * assign_vars[i, j, k]
-                          for i in vrp.EXTLOCS
-                          for j in vrp.EXTLOCS
-                          if i != j) <= vrp.distcap * use_vars[k]
+            block += LpAffineExpression(list(zip(kVars, dists)) +
+                                        [(use_vars[k], -vrp.distcap)]) <= 0
 
         else:
 
             # Strangely returns better solutions with this isolated here.
             # Specify that if a vehicle is used it must enter the depot
             if not vrp.allused:
-                prob += lpSum(assign_vars[i, 'O', k]
-                              for i in vrp.LOCS) == use_vars[k]
+                block += LpAffineExpression([(kVars[a], 1)
+                                             for a in into_arcs['O']] +
+                                            [(use_vars[k], -1)]) == 0
 
             # Cardinality of arcs for vehicles in use
-            prob += lpSum(assign_vars[i, j, k]
-                          for i in vrp.EXTLOCS
-                          for j in vrp.EXTLOCS
-                          if i != j) <= len(vrp.EXTLOCS) * use_vars[k]
-
-    # Attach the problem data and variable dictionaries to the DipProblem
-    prob.vrp = vrp
+            block += LpAffineExpression([(var, 1) for var in kVars] +
+                                        [(use_vars[k], -len(vrp.EXTLOCS))]) <= 0
+
+        # The customers each vehicle visits can't need more than its capacity, and nothing if it isn't used
+        if vrp.capacity is not None:
+            block += LpAffineExpression([(kVars[a], vrp.demand[j])
+                                         for j in vrp.LOCS
+                                         for a in into_arcs[j]] +
+                                        [(use_vars[k], -vrp.capacity)]) <= 0
+
+    # Break the symmetry between identical vehicles
+    if options.get("Symmetry", False):
+
+        # Vehicles are used in order, so an unused vehicle is never followed by a used one
+        if not vrp.allused:
+            for k in vrp.VEHS[:-1]:
+                prob += use_vars[k] >= use_vars[k + 1]
+
+        # Number the routes by their lowest-indexed customer, so the p-th customer can only be
+        # visited by vehicles 1, ..., p
+        for p, j in enumerate(vrp.LOCS, start=1):
+            for k in vrp.VEHS[p:]:
+                for a in into_arcs[j] + outof_arcs[j]:
+                    veh_vars[k][a].upBound = 0
+
+    # Attach the variable dictionaries to the DipProblem
+    prob.formulation = "ThreeIndex"
     prob.assign_vars = assign_vars
     prob.use_vars = use_vars
+    # The arc variables the callbacks separate over, keyed by (i, j, k)
+    prob.arc_vars = assign_vars
+    set_arc_layout(prob)
+    formulate_compact(prob, vrp)
+    formulate_windows(prob, vrp)
 
-    if "Tol" in options:
-        prob.tol = options["Tol"]
-    else:
-        prob.tol = pow(pow(2, -24), 2.0 / 3.0)
+    # Price out routes for each vehicle block
+    if decomp:
+        prob.relaxed_solver = solve_relaxed
 
     return prob
 
 
+# Add the compact subtour elimination constraints the Subtours option asks for over the arc variables summed
+# over the vehicles, x_ij, so no cut callback is needed. With demands d_i (1 if there are none) and
+# capacity Q (the total demand if there is none) they also keep the vehicles' loads within capacity:
+#   MTZ: the load on board after each customer, d_i <= u_i <= Q with u_i - u_j + Q x_ij <= Q - d_j
+#   Flow: the depot sends each customer its demand along the arcs in use, f_ij <= (Q - d_i) x_ij
+def formulate_compact(prob, vrp):
+    if prob.subtours == "Cuts":
+        return
+    demand = vrp.demand if vrp.demand is not None else dict([(i, 1) for i in vrp.LOCS])
+    Q = vrp.capacity if vrp.capacity is not None else sum(demand.values())
+    usage = {}
+    for (i, j, k), var in zip(prob.arc_keys, prob.arc_var_list):
+        usage.setdefault((i, j), []).append(var)
+
+    if prob.subtours == "MTZ":
+        prob.order_vars = LpVariable.dicts("u", vrp.LOCS, 0, Q)
+        for i in vrp.LOCS:
+            prob.order_vars[i].lowBound = demand[i]
+        for (i, j), kVars in usage.items():
+            if i != 'O' and j != 'O':
+                prob += LpAffineExpression([(prob.order_vars[i], 1), (prob.order_vars[j], -1)] +
+                                           [(var, Q) for var in kVars]) <= Q - demand[j]
+
+    elif prob.subtours == "Flow":
+        # No flow returns to the depot
+        prob.flow_vars = LpVariable.dicts("f", [(i, j) for (i, j) in usage if j != 'O'], 0)
+        into = dict([(j, []) for j in vrp.LOCS])
+        outof = dict([(i, []) for i in vrp.LOCS])
+        for (i, j), var in prob.flow_vars.items():
+            into[j].append(var)
+            if i != 'O':
+                outof[i].append(var)
+            cap = Q if i == 'O' else Q - demand[i]
+            prob += LpAffineExpression([(var, 1)] + [(x, -cap) for x in usage[i, j]]) <= 0
+        for j in vrp.LOCS:
+            prob += LpAffineExpression([(var, 1) for var in into[j]] +
+                                       [(var, -1) for var in outof[j]]) == demand[j]
+
+    else:
+        raise Exception("Unknown Subtours option " + repr(prob.subtours) + ", use 'Cuts', 'MTZ' or 'Flow'")
+
+
+# Add the time window constraints over the arc variables summed over the vehicles, x_ij, with the start of
+# service w_i at each customer inside its tightened window [e_i, l_i] and pushed back along every arc in use:
+#   w_i + s_i + t_ij - w_j <= M_ij (1 - x_ij) with M_ij = l_i + s_i + t_ij - e_j
+# The depot has no w, as its vehicles leave at e_O and must be back by l_O, so its arcs tie the customers
+# they leave to and return from to those times instead:
+#   w_j >= e_j + (e_O + s_O + t_Oj - e_j) x_Oj  and  w_i + s_i + t_iO - l_O <= M_iO (1 - x_iO)
+#   with M_iO = l_i + s_i + t_iO - l_O
+# Windows that never close are closed at a horizon no route served as early as possible gets past
+def formulate_windows(prob, vrp):
+    prob.time_vars = {}
+    if vrp.windows is None:
+        return
+    usage = {}
+    for (i, j, k), var in zip(prob.arc_keys, prob.arc_var_list):
+        usage.setdefault((i, j), []).append(var)
+    early, late, service = window_arrays(vrp)
+    dist = np.where(np.isfinite(vrp.distmat), vrp.distmat, 0.0)
+    horizon = early[np.isfinite(early)].max() + (service + dist.max(axis=1)).sum()
+    windows = dict([(i, (e, min(l, horizon))) for i, (e, l) in prob.windows.items()])
+
+    prob.time_vars = LpVariable.dicts("w", vrp.LOCS, 0)
+    for i in vrp.LOCS:
+        prob.time_vars[i].lowBound, prob.time_vars[i].upBound = windows[i]
+    for (i, j), kVars in usage.items():
+        travel = vrp.service[i] + vrp.dist[i, j]
+        if i == 'O':
+            # Leaving the depot at e_O only binds when it gets to j after j opens
+            gap = windows['O'][0] + travel - windows[j][0]
+            if gap > 0:
+                prob += LpAffineExpression([(prob.time_vars[j], 1)] + [(var, -gap) for var in kVars]) >= \
+                    windows[j][0]
+        elif j == 'O':
+            # Nor getting back by l_O when i is always served early enough for it
+            M = windows[i][1] + travel - windows['O'][1]
+            if M > 0:
+                prob += LpAffineExpression([(prob.time_vars[i], 1)] + [(var, M) for var in kVars]) <= \
+                    windows['O'][1] + M - travel
+        else:
+            M = windows[i][1] + travel - windows[j][0]
+            # With M_ij <= 0, i is always served in time for j, so the constraint can't bind
+            if M > 0:
+                prob += LpAffineExpression([(prob.time_vars[i], 1), (prob.time_vars[j], -1)] +
+                                           [(var, M) for var in kVars]) <= M - travel
+
+
+# Number the arc variables once, so the callbacks can read a solution into an array and work on
+# integer arc positions instead of (i, j, k) keys
+def set_arc_layout(prob):
+    prob.arc_keys = list(prob.arc_vars.keys())
+    prob.arc_var_list = [prob.arc_vars[key] for key in prob.arc_keys]
+    prob.arc_tails, prob.arc_heads, prob.arc_blocks, prob.arc_vehs = get_arc_layout(prob.vrp, prob.arc_keys)
+
+
+# The values of the arc variables in sol, in the order of prob.arc_keys
+def get_arc_values(prob, sol):
+    return np.fromiter(map(sol.__getitem__, prob.arc_var_list), dtype=float, count=len(prob.arc_var_list))
+
+
+# Binary variables for keys, taking over (with their bounds reset) those that old already has
+def get_arc_vars(name, keys, old={}):
+    new = LpVariable.dicts(name, [key for key in keys if key not in old], cat=LpBinary)
+    for key in keys:
+        if key not in new:
+            new[key] = old[key]
+            new[key].lowBound = 0
+            new[key].upBound = 1
+    return dict([(key, new[key]) for key in keys])
+
+
+# The length of each of the (i, j) arcs, read from the distance matrix in one go
+def get_arc_dists(vrp, arcs):
+    tails = [vrp.index[i] for (i, j) in arcs]
+    heads = [vrp.index[j] for (i, j) in arcs]
+    return vrp.distmat[tails, heads].tolist()
+
+
+# Positions of the arcs crossing the set of locations S, only those of vehicle block b if given
+def get_crossing_arcs(prob, S, b=None):
+    inS = np.zeros(len(prob.vrp.EXTLOCS), dtype=bool)
+    inS[[prob.vrp.index[i] for i in S]] = True
+    crossing = inS[prob.arc_tails] != inS[prob.arc_heads]
+    if b is not None:
+        crossing &= prob.arc_blocks == b
+    return np.flatnonzero(crossing)
+
+
+# Formulate the two-index IP with vehicle-free arc variables and a fleet size
+def formulate_two_index(prob, vrp, arcs, into_arcs, outof_arcs, dists, old={}):
+
+    arc_vars = get_arc_vars("z", arcs, old)
+    arc_list = [arc_vars[i, j] for (i, j) in arcs]
+
+    # Number of vehicles leaving the depot, all of them if they must all be used
+    fleet_var = LpVariable("fleet",
+                           len(vrp.VEHS) if vrp.allused else prob.pre_stats["FleetBound"],
+                           len(vrp.VEHS),
+                           cat=LpInteger)
+
+    # Objective function: minimise the distance between nodes * whether that arc is used.
+    prob += LpAffineExpression(list(zip(arc_list, dists))), "min_dist"
+
+    # Each node (excluding 'O') must have one arc entering from any other node (including 'O')
+    for j in vrp.LOCS:
+        prob += LpAffineExpression([(arc_list[a], 1)
+                                    for a in into_arcs[j]]) == 1
+
+    # Each node (excluding 'O') must have one arc leaving to any other node (including 'O')
+    for i in vrp.LOCS:
+        prob += LpAffineExpression([(arc_list[a], 1)
+                                    for a in outof_arcs[i]]) == 1
+
+    # Every vehicle in use leaves and re-enters the depot once
+    prob += LpAffineExpression([(arc_list[a], 1)
+                                for a in outof_arcs['O']] +
+                               [(fleet_var, -1)]) == 0
+    prob += LpAffineExpression([(arc_list[a], 1)
+                                for a in into_arcs['O']] +
+                               [(fleet_var, -1)]) == 0
+
+    # Attach the variable dictionaries to the DipProblem
+    prob.formulation = "TwoIndex"
+    prob.fleet_var = fleet_var
+    # The callbacks see the whole fleet as one vehicle, k = 0
+    prob.arc_vars = dict([((i, j, 0), var) for (i, j), var in arc_vars.items()])
+    # Per-vehicle views of the solution, filled in by solve
+    prob.assign_vars = {}
+    prob.use_vars = {}
+
+
 # Solve the TSP
 def solve(prob, options={}):
 
+    # Look for a solution of the same instance with the same options in the cache, if one is given
+    cache = options.get("Cache") if not prob.infeasible else None
+    record = None
+    if cache is not None:
+        key = fingerprint(prob.vrp, options)
+        record = cache.get(key)
+        # The cached solution may use pruned arcs the reduced cost check put back, so the model is rebuilt
+        # over the arcs it was solved on
+        if record is not None and record.get("Arcs") is not None:
+            arcs = [tuple(arc) for arc in record["Arcs"]]
+            if set(arcs) != set(prob.arcs):
+                full = formulate(prob.vrp, prob.formulate_options, arcs=arcs)
+                full.pruned = False
+                replace_model(prob, full)
+        # A solution with variables the model doesn't have can't be loaded into it, so it is solved again
+        if record is not None and record["Objective"] is not None:
+            names = set(var.name for var in prob.variables())
+            if any(name not in names for name in record["Values"]):
+                prob.stats.report("The cached solution doesn't fit the model, solving it again")
+                record = None
+
     # Set the options
     prob.options = options
+    # Time the callbacks, and log each cut and feasibility check when tracing
+    prob.stats = CallbackStats(options.get("Stats", STATS))
+
+    # Compact formulations already rule out subtours, so a one-shot MIP solve needs no callbacks
+    if prob.subtours == "Cuts":
+        # When checking feasibility, use a callback
+        # to check for subtours
+        prob.is_solution_feasible = is_solution_feasible
+        # When generating cuts, use a callback
+        # to generate subtour elimination constraints
+        prob.generate_cuts = generate_cuts
 
-    # When checking feasibility, use a callback
-    # to check for subtours
-    prob.is_solution_feasible = is_solution_feasible
-    # When generating cuts, use a callback
-    # to generate subtour elimination constraints
-    prob.generate_cuts = generate_cuts
+    if "Interval" in options:
+        prob.display_interval = options["Interval"]
+
+    # Improve rounded LP solutions at the nodes with local search
+    prob.local_search = LocalSearch(prob.vrp) if options.get("LocalSearch", False) else None
+    prob.ls_stats = {"Calls": 0, "Time": 0.0, "MaxTime": 0.0, "Incumbents": 0,
+                     "Moves": {"2-opt": 0, "or-opt": 0, "relocate": 0, "exchange": 0}}
+    prob.ls_best = float("inf")
+
+    # Offer a Clarke-Wright savings solution to Dippy as the first incumbent
+    prob.warm_start = None
+    prob.warm_stats = None
+    if (options.get("WarmStart", False) or prob.start_routes is not None) and record is None:
+        start = time.perf_counter()
+        # The routes reoptimize repaired from the previous solution, if there are any
+        routes = prob.start_routes if prob.start_routes is not None else savings(prob.vrp)
+        if routes is not None and prob.local_search is not None:
+            routes, counts = prob.local_search.improve(routes)
+        elapsed = time.perf_counter() - start
+        if routes is not None:
+            prob.warm_start = routes_to_solution(prob, routes)
+        if prob.warm_start is not None:
+            prob.warm_stats = {"Objective": sum(route_length(prob.vrp, route) for route in routes),
+                               "Time": elapsed}
+            prob.ls_best = prob.warm_stats["Objective"]
+            prob.stats.report("Warm start =", prob.warm_stats["Objective"], "in", elapsed, "s")
+        else:
+            prob.stats.report("No feasible warm start found")
+    if prob.warm_start is not None or prob.local_search is not None:
+        prob.heuristics = heuristics
+
+    # Arcs in the model and pruned arcs put back by the reduced cost check
+    prob.arc_stats = {"Arcs": len(prob.arcs), "Restored": 0, "Resolves": 0}
+
+    # Count the branch-and-bound nodes Dippy processes, or CBC reports in its log
+    prob.nodes = 0
+    prob.post_process_node = count_node
+
+    # Pool of the subtour cuts already sent to Dippy or carried over from an earlier model, hashed by
+    # vehicle and arc set, and the cuts themselves by location so reoptimize can carry them over
+    prob.cut_pool = set(prob.pool_keys)
+    prob.cut_log = list(prob.pool_cuts)
+    prob.cut_stats = {"Rounds": 0, "Cuts": 0, "Duplicates": 0, "RoundsSaved": 0}
+
+    # Preprocessing has already proved there is no feasible solution
+    if prob.infeasible:
+        prob.stats.report("Preprocessing proved the problem infeasible, Dippy was not called")
+        return None
+
+    if record is not None:
+        return cached_solution(prob, record)
+
+    # Dippy draws the tree into the current figure when it displays one
+    if prob.display_mode != "none":
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=FIGSIZE)
+    # Profile the whole solve, saving the profile to a file if the option names one
+    _, backend_solve = load_backend(prob.backend)
+    if options.get("Profile", False):
+        path = options["Profile"] if isinstance(options["Profile"], str) else None
+        status, message, primals, duals = prob.stats.run_profiled(backend_solve, prob, options, path=path)
+    else:
+        status, message, primals, duals = backend_solve(prob, options)
+    prob.status = status
+
+    if prob.stats.level >= TRACE:
+        print(prob.stats.summary())
+
+    if options.get("AllCuts", False):
+        prob.stats.report("Cut rounds =", prob.cut_stats["Rounds"],
+                          "cuts =", prob.cut_stats["Cuts"],
+                          "LP rounds saved =", prob.cut_stats["RoundsSaved"])
+
+    if prob.local_search is not None:
+        calls = max(prob.ls_stats["Calls"], 1)
+        prob.stats.report("Local search calls =", prob.ls_stats["Calls"],
+                          "mean time =", prob.ls_stats["Time"] / calls, "s",
+                          "max time =", prob.ls_stats["MaxTime"], "s",
+                          "incumbents =", prob.ls_stats["Incumbents"],
+                          "moves =", prob.ls_stats["Moves"])
+
+    # Put back any pruned arcs that reduced costs can't rule out of a better solution, and re-solve
+    if prob.pruned:
+        extra = get_restored_arcs(prob, value(prob.objective) if status == LpStatusOptimal else float("inf"))
+        prob.stats.report("Arc pruning kept", len(prob.arcs), "arcs, reduced costs restore", len(extra))
+        if len(extra) > 0:
+            full = formulate(prob.vrp, prob.formulate_options, arcs=prob.arcs + extra, reuse=prob)
+            # Any solution over the arcs still left out costs at least the incumbent, so one re-solve is exact
+            full.pruned = False
+            # The cuts found so far hold for the full model too
+            full.start_routes = prob.start_routes
+            add_pool_cuts(full, prob.cut_log)
+            xopt = solve(full, dict([(name, opt) for name, opt in options.items() if name != "Cache"]))
+            full.arc_stats["Restored"] = len(extra)
+            full.arc_stats["Resolves"] = 1
+            # The caller's prob becomes the re-solved model
+            replace_model(prob, full)
+            if cache is not None:
+                cache_solution(prob, cache, key)
+            return xopt
+
+    # Compare the warm start with the final objective
+    if prob.warm_stats is not None and status == LpStatusOptimal:
+        optimum = value(prob.objective)
+        prob.warm_stats["Gap"] = (prob.warm_stats["Objective"] - optimum) / optimum if optimum else 0.0
+        prob.stats.report("Warm start gap to optimum = {:.2%}".format(prob.warm_stats["Gap"]))
+
+    if cache is not None:
+        cache_solution(prob, cache, key)
 
+    if status == LpStatusOptimal:
+        xopt = dict((var, var.value()) for var in prob.variables())
+        if prob.formulation == "TwoIndex":
+            xopt.update(split_routes(prob, xopt))
+        return xopt
+    else:
+        return None
+
+
+# Solve with Dippy's branch, price and cut
+def solve_dippy(prob, options):
     dippyOpts = {
         #               'CutCGL': 1, # <----- Cuts turned on
         'CutCGL': 0,  # <----- Cuts turned off
@@ -141,18 +659,284 @@ def solve(prob, options={}):
     # Can use Cut Generator Library (CGL) cuts too
     if ("Cuts" in options) and (options["Cuts"] == "CGL"):
         dippyOpts['CutCGL'] = 1
-    if "Interval" in options:
-        prob.display_interval = options["Interval"]
+    # Branch, price and cut when the vehicles are relaxation blocks
+    if prob.relaxed_solver is not None:
+        dippyOpts['doPriceCut'] = 1
+    # Prune any node whose bound can't beat a known objective value
+    if "Cutoff" in options:
+        dippyOpts['BestKnownUB'] = options["Cutoff"]
+    return dippy.Solve(prob, dippyOpts)
+
+
+# Keep an optimal solution, or the proof there is none, in the cache under key
+def cache_solution(prob, cache, key):
+    if prob.status == LpStatusOptimal:
+        record = {"Objective": value(prob.objective),
+                  "Values": dict([(var.name, var.varValue) for var in prob.variables() if var.varValue]),
+                  # Needed to rebuild the model when it doesn't have every allowed arc, or when formulate
+                  # would prune it to fewer arcs than it was solved on
+                  "Arcs": prob.arcs if (len(prob.arcs) < len(prob.allowed) or
+                                        "Neighbours" in prob.formulate_options) else None}
+    elif prob.status == LpStatusInfeasible:
+        record = {"Objective": None}
+    else:
+        return
+    cache.put(key, record)
 
-    plt.figure(figsize=FIGSIZE)
-    status, message, primals, duals = dippy.Solve(prob, dippyOpts)
 
-    if status == LpStatusOptimal:
-        return dict((var, var.value()) for var in prob.variables())
+# Load a cached solution into the variables of prob, as solve would return it
+def cached_solution(prob, record):
+    if record["Objective"] is None:
+        prob.status = LpStatusInfeasible
+        prob.stats.report("The cache has the problem as infeasible, Dippy was not called")
+        return None
+
+    prob.status = LpStatusOptimal
+    values = record["Values"]
+    for var in prob.variables():
+        var.varValue = values.get(var.name, 0)
+    prob.stats.report("Solution found in the cache, objective =", record["Objective"])
+    xopt = dict((var, var.value()) for var in prob.variables())
+    if prob.formulation == "TwoIndex":
+        xopt.update(split_routes(prob, xopt))
+    return xopt
+
+
+# Pruned arcs that could be in a solution cheaper than the incumbent, given their reduced costs
+# in the assignment relaxation priced over every arc
+def get_restored_arcs(prob, incumbent):
+    vrp = prob.vrp
+    bound, redcosts = get_arc_prices(vrp, prob.arcs, prob.allowed)
+    if bound is None:
+        return []
+    kept = set(prob.arcs)
+    return [(i, j) for (i, j) in prob.allowed
+            if (i, j) not in kept and bound + redcosts[vrp.index[i], vrp.index[j]] < incumbent - prob.tol]
+
+
+# Map a two-index solution back to per-vehicle y and x variables, one route per vehicle
+def split_routes(prob, xopt):
+    vrp = prob.vrp
+
+    # Follow each route out of the depot
+    succ = dict([(i, j) for (i, j, k), var in prob.arc_vars.items() if xopt[var] > 1.0 - prob.tol])
+    starts = [j for (i, j, k), var in prob.arc_vars.items() if i == 'O' and xopt[var] > 1.0 - prob.tol]
+    keys = []
+    for k, j in zip(vrp.VEHS, starts):
+        keys.append(('O', j, k))
+        while j != 'O':
+            keys.append((j, succ[j], k))
+            j = succ[j]
+
+    # Only the arcs in use get a y variable
+    prob.assign_vars = LpVariable.dicts("y", keys, cat=LpBinary)
+    prob.use_vars = LpVariable.dicts("x", vrp.VEHS, cat=LpBinary)
+    for var in prob.assign_vars.values():
+        var.varValue = 1
+    for k, var in prob.use_vars.items():
+        var.varValue = 1 if k <= len(starts) else 0
+
+    return dict([(var, var.varValue) for var in list(prob.assign_vars.values()) + list(prob.use_vars.values())])
+
+
+# Map routes, one per vehicle, onto the variables of the model, or None if the model can't take them
+def routes_to_solution(prob, routes):
+    vrp = prob.vrp
+    if len(routes) > len(vrp.VEHS):
+        return None
+    # Number the routes by their lowest-indexed customer, as the symmetry breaking expects
+    routes = sorted(routes, key=lambda route: min(vrp.index[i] for i in route))
+    if prob.formulation == "TwoIndex":
+        keys = [(i, j, 0) for route in routes for (i, j) in route_arcs(route)]
+    else:
+        keys = [(i, j, k) for k, route in zip(vrp.VEHS, routes) for (i, j) in route_arcs(route)]
+
+    # The arcs must still be in the model
+    if any((key not in prob.arc_vars) or (prob.arc_vars[key].upBound == 0) for key in keys):
+        return None
+    if vrp.distcap is not None and any(route_length(vrp, route) > vrp.distcap + prob.tol for route in routes):
+        return None
+    if vrp.capacity is not None and any(route_load(vrp, route) > vrp.capacity + prob.tol for route in routes):
+        return None
+    times = [route_times(vrp, route) for route in routes]
+    if None in times:
+        return None
+
+    solution = dict([(prob.arc_vars[key], 1) for key in keys])
+    # Each customer is served as early as its route allows
+    if prob.time_vars:
+        for route, starts in zip(routes, times):
+            solution.update(zip([prob.time_vars[i] for i in route], starts))
+    if prob.formulation == "TwoIndex":
+        solution[prob.fleet_var] = len(routes)
+    else:
+        for k in vrp.VEHS[:len(routes)]:
+            solution[prob.use_vars[k]] = 1
+    return solution
+
+
+# Re-solve a solved problem after a what-if change to its VRProb (see VRProb.applyDelta). The model is
+# rebuilt in place over the arc variables it already has, solve starts from the previous routes repaired
+# for the change, and the previous cuts that still apply are put in the model up front
+def reoptimize(prob, delta, options=None):
+    if options is None:
+        if not hasattr(prob, "options"):
+            raise ValueError("prob has not been solved, so reoptimize needs the options to solve with")
+        options = prob.options
+    start = time.perf_counter()
+    vrp = prob.vrp.applyDelta(delta)
+    routes = solution_routes(prob) if prob.status == LpStatusOptimal else None
+    cuts = prob.cut_log
+
+    # The caller's prob becomes the model of the changed problem
+    new = formulate(vrp, prob.formulate_options, reuse=prob)
+    old = set(map(id, prob.arc_vars.values()))
+    reused = sum(id(var) in old for var in new.arc_vars.values())
+    replace_model(prob, new)
+    # A savings solution if the previous routes can't be repaired, e.g. after a much tighter cap
+    repaired = None
+    if routes is not None and not prob.infeasible:
+        repaired = repair_routes(vrp, routes)
+        prob.start_routes = repaired if repaired is not None else savings(vrp)
+    add_pool_cuts(prob, cuts)
+
+    prob.reopt_stats = {"Time": time.perf_counter() - start,
+                        "Reused": reused,
+                        "Variables": len(prob.arc_vars),
+                        "Cuts": len(prob.pool_cuts),
+                        "Dropped": len(cuts) - len(prob.pool_cuts),
+                        "Repaired": repaired is not None}
+    prob.stats.report("Re-optimisation kept", reused, "of", len(prob.arc_vars), "arc variables and",
+                      len(prob.pool_cuts), "of", len(cuts), "cuts in", prob.reopt_stats["Time"], "s")
+    return solve(prob, options)
+
+
+# Make prob the model new in place, so the caller's reference sees it, without keeping anything of prob's
+# own model that new doesn't have, e.g. the order variables of a compact formulation it no longer uses
+def replace_model(prob, new):
+    prob.__dict__.clear()
+    prob.__dict__.update(new.__dict__)
+
+
+# The routes of the solution in the variables of a solved problem, one per vehicle in use
+def solution_routes(prob):
+    succ = dict([((i, k), j) for (i, j, k), var in prob.assign_vars.items()
+                 if var.varValue is not None and var.varValue > 0.5])
+    routes = []
+    for k in prob.vrp.VEHS:
+        route = []
+        j = succ.get(('O', k))
+        while j is not None and j != 'O':
+            route.append(j)
+            j = succ.get((j, k))
+        if route:
+            routes.append(route)
+    return routes
+
+
+# Put the cuts of an earlier model that still hold for the locations, arcs and vehicles of prob into it
+# as constraints, and into the pool so they are not separated again
+def add_pool_cuts(prob, cuts):
+    prob.pool_cuts = []
+    prob.pool_keys = set()
+    if prob.infeasible:
+        return
+    position = dict([(key, a) for a, key in enumerate(prob.arc_keys)])
+    block = dict([(k, b) for b, k in enumerate(prob.arc_vehs)])
+    locs = set(prob.vrp.LOCS)
+    for (kind, k, S, t) in cuts:
+        if kind == "Path":
+            # The path must still be there and still be too late with the new windows
+            if prob.vrp.windows is None or any(i not in prob.vrp.index for i in S) or \
+                    not path_is_late(prob.vrp, S, prob.tol):
+                continue
+            key = ("Path", S)
+            con = get_path_cut(prob, S)
+        elif kind == "Subtour":
+            tArcs = [position.get((i, j, k)) for (i, j) in S]
+            if None in tArcs:
+                continue
+            key = ("Subtour", frozenset(tArcs))
+            con = lpSum(prob.arc_var_list[a] for a in tArcs) <= len(tArcs) - 1
+        elif not S <= locs:
+            continue
+        elif kind == "Capacity":
+            # The demands or capacity may have changed, so the right-hand side is worked out again
+            if prob.vrp.capacity is None:
+                continue
+            key = ("Capacity", S)
+            con = get_cutset_cut(prob, S, rhs=get_capacity_rhs(prob.vrp, S))
+        elif k is None:
+            key = ("All", S)
+            con = get_cutset_cut(prob, S)
+        elif k in block:
+            key = (k, S, t)
+            con = get_cutset_cut(prob, S, block[k], t)
+        else:
+            continue
+        if key in prob.pool_keys:
+            continue
+        prob += con
+        prob.pool_keys.add(key)
+        prob.pool_cuts.append((kind, k, S, t))
+
+
+# User callback for heuristic solutions, which hands over the warm start once and then
+# the locally improved rounding of each node's LP solution
+@instrumented(count=len)
+def heuristics(prob, xhat, costs):
+    sols = []
+    if prob.warm_start is not None:
+        sols.append(prob.warm_start)
+        prob.warm_start = None
+    if prob.local_search is not None:
+        solution = improve_node(prob, xhat)
+        if solution is not None:
+            sols.append(solution)
+    if len(sols) > 0:
+        return sols
     else:
         return None
 
 
+# Round a node's LP solution to routes and improve them, returning them if they beat the best so far
+def improve_node(prob, xhat):
+    start = time.perf_counter()
+    stats = prob.ls_stats
+    stats["Calls"] += 1
+
+    # Arc values summed over the vehicles
+    weights = {}
+    with prob.stats.extracting("heuristics"):
+        vals = get_arc_values(prob, xhat)
+    for a in np.flatnonzero(vals > prob.tol).tolist():
+        i, j, k = prob.arc_keys[a]
+        weights[i, j] = weights.get((i, j), 0) + vals[a]
+
+    solution = None
+    routes = round_routes(prob.vrp, weights, prob.tol)
+    if routes is not None:
+        routes, counts = prob.local_search.improve(routes)
+        for move, count in counts.items():
+            stats["Moves"][move] += count
+        objective = sum(route_length(prob.vrp, route) for route in routes)
+        if objective < prob.ls_best - prob.tol:
+            solution = routes_to_solution(prob, routes)
+            if solution is not None:
+                prob.ls_best = objective
+                stats["Incumbents"] += 1
+
+    elapsed = time.perf_counter() - start
+    stats["Time"] += elapsed
+    stats["MaxTime"] = max(stats["MaxTime"], elapsed)
+    return solution
+
+
+# User callback run after each branch-and-bound node
+def count_node(prob, node):
+    prob.nodes += 1
+
+
 def solve_and_display(prob, options={}):
     xopt = solve(prob, options)
 
@@ -177,15 +961,16 @@ def solve_and_display(prob, options={}):
 
 
 # User callback for generating cuts
+@instrumented(count=len)
 def generate_cuts(prob, sol):
 
     # No constraints added
     cons = []
     cons_added = 0
 
-    # Get the assignment variables and values
-    assign_vars = prob.assign_vars
-    assign_vals = dict([((i, j, k), sol[assign_vars[i, j, k]]) for (i, j, k) in assign_vars.keys()])
+    # Get the arc values as an array, in the order of prob.arc_keys
+    with prob.stats.extracting("generate_cuts"):
+        vals = get_arc_values(prob, sol)
 
     # Get the threshold for whether an arc should be considered
     # as part of the solution (almost = 1 by default)
@@ -194,64 +979,251 @@ def generate_cuts(prob, sol):
     else:
         threshold = 1.0 - prob.tol  # Default is only consider integer arcs
 
-    # Get the graphs for each vehicle
-    nodes = prob.vrp.EXTLOCS[:]
-    arcs = [(i, j, k) for (i, j, k) in assign_vars.keys() if sol[assign_vars[i, j, k]] > threshold]
+    # Return every violated cut in one round rather than one cut per LP solve
+    all_cuts = prob.options.get("AllCuts", False)
 
-    # Loop over the vehicles that are used
-    for k in prob.vrp.VEHS:
+    # Label the connected components of every vehicle's arcs at once, and keep those that are
+    # subtours (cycles that don't include the depot)
+    subtours = get_subtours(prob.vrp, prob.arc_tails, prob.arc_heads, prob.arc_blocks, vals > threshold)
 
-        # Extract the arcs for each vehicle
-        vehArcs = [x[:2] for x in arcs if x[2] == k]
+    for tArcs in subtours:
 
-        # Define the set of nodes that have not been put in a connected component
-        not_connected = set(nodes[:])
+        # Never send a cut that is already in the pool, the arc positions fix the vehicle too
+        key = ("Subtour", frozenset(tArcs.tolist()))
+        if key in prob.cut_pool:
+            prob.cut_stats["Duplicates"] += 1
+            continue
+        prob.cut_pool.add(key)
+        cons_added += 1
 
-        # While any nodes are not in a connected component
-        while not_connected:
+        # If a subtour is found then that graph must be banned
+        cons.append(lpSum(prob.arc_var_list[a] for a in tArcs) <= len(tArcs) - 1)
+        k = prob.arc_vehs[prob.arc_blocks[tArcs[0]]]
+        prob.cut_log.append(("Subtour", k, frozenset(prob.arc_keys[a][:2] for a in tArcs.tolist()), None))
 
-            # Get an unconnected node
-            start = not_connected.pop()
+        prob.stats.log("Subtour elimination!", cons[-1])
 
-            # Find a subtour from that starting node
-            tNodes, tArcs = get_subtour(nodes, vehArcs, start)
+        # Return one subtour elimination constraint at a time unless all cuts were asked for
+        if not all_cuts:
+            break
 
-            # If it is a subtour (and not a complete tour), add a subtour elimination constraint provided that
-            # the depot is not included in the subtour,
-            if len(tNodes) == len(tArcs) and len(tNodes) < len(nodes) and ('O' not in tNodes):
-                cons_added += 1
+    # Exact separation of the cutset form of the subtour elimination constraints on fractional solutions
+    if prob.options.get("Separation") == "MinCut":
+        cons.extend(get_mincut_cuts(prob, vals))
 
-                # If a subtour is found then that graph must be banned
+    # Rounded capacity inequalities, on the fractional solution unless CapacityCuts is off, in which
+    # case only the vehicles' loads in integer solutions are checked
+    if prob.vrp.capacity is not None:
+        if prob.options.get("CapacityCuts", True):
+            cons.extend(get_capacity_cuts(prob, vals))
+        else:
+            cons.extend(get_capacity_cuts(prob, np.where(vals > threshold, vals, 0.0)))
 
-                # Option 1
-                cons.append(lpSum(assign_vars[i, j, k]
-                                  for (i, j) in tArcs) <= len(tArcs) - 1)
+    # Infeasible path inequalities, which the big-M time window constraints are too weak to imply, on the
+    # fractional solution unless PathCuts is off. The routes of the integer arcs are always checked, so
+    # any route is_solution_feasible finds late is cut off
+    if prob.vrp.windows is not None:
+        cons.extend(get_path_cuts(prob, vals, threshold))
 
-                # Option 2
-                # cons.append(lpSum(assign_vars[i, j, k]
-                #                   for i in tNodes
-                #                   for j in set(nodes).difference(tNodes)) +
-                #             lpSum(assign_vars[j, i, k]
-                #                   for i in tNodes
-                #                   for j in set(nodes).difference(tNodes))
-                #             >= 2)
+    if len(cons) > 0:
+        # Each extra cut returned in this round would otherwise have needed its own LP re-solve
+        prob.cut_stats["Rounds"] += 1
+        prob.cut_stats["Cuts"] += len(cons)
+        prob.cut_stats["RoundsSaved"] += len(cons) - 1
+        return cons
+    else:
+        return None
 
-                print("Subtour elimination!", cons[-1])
 
-                # Return one subtour elimination constraint at a time
-                if cons_added == 1:
-                    return cons
+# User callback for pricing out the routes of vehicle k
+@instrumented(count=lambda result: len(result[1]))
+def solve_relaxed(prob, k, redCosts, target):
+    vrp = prob.vrp
 
-            # Remove the subtour nodes as they are now connected
-            not_connected -= set(tNodes)
+    # Reduced costs of the arcs vehicle k may still use
+    with prob.stats.extracting("solve_relaxed"):
+        costs = dict([((i, j), redCosts[var]) for (i, j, khat), var in prob.assign_vars.items()
+                      if khat == k and var.upBound != 0])
 
-    if len(cons) > 0:
-        return cons
+    routes, complete = shortest_routes(vrp, costs, vrp.distcap,
+                                       prob.options.get("MaxLabels", 100000),
+                                       prob.options.get("MaxColumns", 10),
+                                       vrp.capacity,
+                                       window_arrays(vrp) if vrp.windows is not None else None)
+
+    # Each route is a column that uses vehicle k
+    cols = []
+    for cost, arcs in routes:
+        col = dict([(prob.assign_vars[i, j, k], 1) for (i, j) in arcs])
+        col[prob.use_vars[k]] = 1
+        cols.append(col)
+
+    # Leaving the vehicle at the depot is a column too when the vehicle doesn't have to be used
+    if not vrp.allused and prob.use_vars[k].lowBound < 1:
+        cols.append({})
+
+    if complete:
+        return dippy.DipSolStatOptimal, cols
     else:
-        return None
+        return dippy.DipSolStatFeasible, cols
+
+
+# Separate violated cutsets x(delta(S)) >= 2 with minimum cuts of the LP support graphs
+def get_mincut_cuts(prob, vals):
+
+    cons = []
+    vrp = prob.vrp
+    cut_tol = prob.options.get("CutTol", 1e-3)
+
+    # Positive arc values, for each vehicle block and summed over all vehicles
+    total = {}
+    vehVals = {}
+    for a in np.flatnonzero(vals > prob.tol).tolist():
+        i, j, k = prob.arc_keys[a]
+        total[i, j] = total.get((i, j), 0) + vals[a]
+        vehVals.setdefault(prob.arc_blocks[a], {})[i, j] = vals[a]
+
+    # Across all vehicles every customer is visited, so every set S of customers must be crossed at least twice
+    for S, t in get_cutsets(vrp, total, dict([(t, 2) for t in vrp.LOCS]), cut_tol):
+        key = ("All", frozenset(S))
+        if key in prob.cut_pool:
+            prob.cut_stats["Duplicates"] += 1
+            continue
+        prob.cut_pool.add(key)
+        cons.append(get_cutset_cut(prob, S))
+        prob.cut_log.append(("Cutset", None, frozenset(S), None))
+        prob.stats.log("Cutset elimination!", sorted(S, key=str))
+
+    # The two-index formulation has no separate vehicles
+    if prob.formulation == "TwoIndex":
+        return cons
+
+    # A single vehicle only has to cross S twice if it visits t in S
+    for b, kVals in vehVals.items():
+        k = prob.arc_vehs[b]
+        visits = {}
+        for (i, j), val in kVals.items():
+            visits[j] = visits.get(j, 0) + 2 * val
+        for S, t in get_cutsets(vrp, kVals, visits, cut_tol):
+            key = (k, frozenset(S), t)
+            if key in prob.cut_pool:
+                prob.cut_stats["Duplicates"] += 1
+                continue
+            prob.cut_pool.add(key)
+            cons.append(get_cutset_cut(prob, S, b, t))
+            prob.cut_log.append(("Cutset", k, frozenset(S), t))
+            prob.stats.log("Cutset elimination!", k, sorted(S, key=str))
+
+    return cons
+
+
+# Separate violated rounded capacity inequalities x(delta(S)) >= 2 ceil(d(S) / Q) with the connected
+# component and shrinking heuristics of get_capacity_sets
+def get_capacity_cuts(prob, vals):
+
+    cons = []
+    vrp = prob.vrp
+    cut_tol = prob.options.get("CutTol", 1e-3)
+
+    # Every set S of customers needs at least ceil(d(S) / Q) vehicles, each crossing S twice
+    for S, rhs in get_capacity_sets(vrp, get_arc_weights(prob, vals > prob.tol, vals), cut_tol):
+        key = ("Capacity", frozenset(S))
+        if key in prob.cut_pool:
+            prob.cut_stats["Duplicates"] += 1
+            continue
+        prob.cut_pool.add(key)
+        cons.append(get_cutset_cut(prob, S, rhs=rhs))
+        prob.cut_log.append(("Capacity", None, frozenset(S), None))
+        prob.stats.log("Rounded capacity cut!", sorted(S, key=str))
+
+    return cons
+
 
+# Separate violated infeasible path inequalities x(A(P)) <= |A(P)| - 1, for paths P no route can follow
+# within the time windows: the late starts of the routes the arcs above threshold follow, and unless
+# PathCuts is off, those the depth-first search of get_infeasible_paths finds
+def get_path_cuts(prob, vals, threshold):
 
-# User callback for checking feasibility
+    cons = []
+    vrp = prob.vrp
+    cut_tol = prob.options.get("CutTol", 1e-3)
+
+    paths = get_late_paths(prob, vals > threshold)
+    if prob.options.get("PathCuts", True):
+        paths += get_infeasible_paths(vrp, get_arc_weights(prob, vals > prob.tol, vals), cut_tol,
+                                      prob.options.get("MaxPathArcs", 6))
+    for path in paths:
+        key = ("Path", path)
+        if key in prob.cut_pool:
+            prob.cut_stats["Duplicates"] += 1
+            continue
+        prob.cut_pool.add(key)
+        cons.append(get_path_cut(prob, path))
+        prob.cut_log.append(("Path", None, path, None))
+        prob.stats.log("Infeasible path!", path)
+
+    return cons
+
+
+# The routes out of the depot that the selected arcs of each vehicle follow, each cut short at the first
+# location it misses the time window of, for the routes that miss one
+def get_late_paths(prob, selected):
+    vrp = prob.vrp
+    depot = vrp.index['O']
+    tails, heads, blocks = (a[selected].tolist() for a in (prob.arc_tails, prob.arc_heads, prob.arc_blocks))
+    succ = dict([((b, i), j) for i, j, b in zip(tails, heads, blocks) if i != depot])
+
+    paths = []
+    for i, j, b in zip(tails, heads, blocks):
+        if i != depot:
+            continue
+        path = ('O',)
+        while True:
+            path += (vrp.EXTLOCS[j],)
+            if path_is_late(vrp, path, prob.tol):
+                paths.append(path)
+                break
+            # A location already on the path closes a subtour, which is cut off separately
+            if j == depot or (b, j) not in succ or vrp.EXTLOCS[succ[b, j]] in path[1:]:
+                break
+            j = succ[b, j]
+    return paths
+
+
+# The cut x(A(P)) <= |A(P)| - 1 over all vehicles' arcs along path
+def get_path_cut(prob, path):
+    index = prob.vrp.index
+    along = np.zeros(len(prob.arc_keys), dtype=bool)
+    for i, j in zip(path[:-1], path[1:]):
+        along |= (prob.arc_tails == index[i]) & (prob.arc_heads == index[j])
+    return lpSum(prob.arc_var_list[a] for a in np.flatnonzero(along)) <= len(path) - 2
+
+
+# The (i, j) arc values summed over the vehicles, for the selected arc positions
+def get_arc_weights(prob, selected, vals):
+    weights = {}
+    for a in np.flatnonzero(selected).tolist():
+        i, j, k = prob.arc_keys[a]
+        weights[i, j] = weights.get((i, j), 0) + vals[a]
+    return weights
+
+
+# Right-hand side of the rounded capacity inequality of the set of customers S
+def get_capacity_rhs(vrp, S):
+    return 2 * ceil(sum(vrp.demand[i] for i in S) / vrp.capacity)
+
+
+# The cut x(delta(S)) >= rhs, or for vehicle block b, x_b(delta(S)) >= 2 x_b(delta-(t)) with t in S
+def get_cutset_cut(prob, S, b=None, t=None, rhs=2):
+    crossing = lpSum(prob.arc_var_list[a] for a in get_crossing_arcs(prob, S, b))
+    if b is None:
+        return crossing >= rhs
+    into_t = np.flatnonzero((prob.arc_blocks == b) & (prob.arc_heads == prob.vrp.index[t]))
+    return crossing >= 2 * lpSum(prob.arc_var_list[a] for a in into_t)
+
+
+# User callback for checking feasibility, counting the solutions it rejects
+@instrumented(count=lambda feasible: int(not feasible))
 def is_solution_feasible(prob, sol, tol):
 
     # Display feasibility checks if desired
@@ -266,44 +1238,34 @@ def is_solution_feasible(prob, sol, tol):
     else:
         threshold = 1.0 - prob.tol  # Default is only consider integer arcs
 
-    # Get the assignment variables
-    assign_vars = prob.assign_vars
-    assign_vals = dict([((i, j, k), sol[assign_vars[i, j, k]])
-                       for (i, j, k) in assign_vars.keys()])
-
-    # Get the graphs for each vehicle
-    nodes = prob.vrp.EXTLOCS[:]
-    arcs = [(i, j, k) for (i, j, k) in assign_vars.keys() if sol[assign_vars[i, j, k]] > threshold]
-
-    # Loop over the vehicles that are used
-    for k in prob.vrp.VEHS:
-
-        # Extract the arcs for each vehicle to pass into get_subtour()
-        vehArcs = [x[:2] for x in arcs if x[2] == k]
-
-        # Define the set of nodes that have not been put in a connected component
-        not_connected = set(nodes[:])
-
-        # While any nodes are not in a connected component
-        while not_connected:
+    # Get the arc values as an array, in the order of prob.arc_keys
+    with prob.stats.extracting("is_solution_feasible"):
+        vals = get_arc_values(prob, sol)
 
-            # Get an unconnected node
-            start = not_connected.pop()
+    # Label the connected components of every vehicle's arcs at once, looking for subtours
+    # (cycles that don't include the depot)
+    subtours = get_subtours(prob.vrp, prob.arc_tails, prob.arc_heads, prob.arc_blocks, vals > threshold)
 
-            # Find a subtour from that node
-            tNodes, tArcs = get_subtour(nodes, vehArcs, start)
-            # tNodes, tArcs = get_subtour(nodes, vehArcs, nodes[0])
+    # If a subtour is found then the solution is not feasible, so will declare it as such
+    if len(subtours) > 0:
+        prob.stats.log("Solution has subtours!")
+        return False
 
-            #   If a subtour is found then the solution is not feasible, so will declare it as such
-            if (len(tNodes) == len(tArcs)) and (len(tNodes) < len(nodes)) and ('O' not in tNodes):
-                print("Solution has subtours!")
-                return False
+    # Nor is it if a route needs more than a vehicle's capacity, which only the two-index
+    # formulation with capacity cuts allows
+    if prob.vrp.capacity is not None and get_capacity_sets(prob.vrp, get_arc_weights(prob, vals > threshold, vals),
+                                                           prob.tol):
+        prob.stats.log("Solution overloads a vehicle!")
+        return False
 
-            # Remove the subtour nodes as they are now connected
-            not_connected -= set(tNodes)
+    # Nor if a route misses a time window. The time window constraints rule that out for integer
+    # solutions, but the routes are read from the arcs above threshold, which Tours can set below 1
+    if prob.vrp.windows is not None and get_late_paths(prob, vals > threshold):
+        prob.stats.log("Solution misses a time window!")
+        return False
 
     # Otherwise it is feasible
-    print("Solution has no subtours!")
+    prob.stats.log("Solution has no subtours!")
     return True
 
 
@@ -1,10 +1,41 @@
+from multiprocessing import Pool
 from random import random, seed
 
 from matplotlib.backends.backend_pdf import PdfPages
 import matplotlib.pyplot as plt
 
+import veh_rout_prob
+from veh_rout_cache import CACHEPATH, SolutionCache
 from veh_rout_prob_Dav import VRProb
-from crou060_veh_rout_func import myopts, formulate, solve_and_display, get_assignments
+from crou060_veh_rout_func import formulate, solve, get_assignments
+
+def solve_seed(n_veh, distcap, useall, s, cache=None):
+    # Solves the problem for seed s in a worker process, reusing the
+    # solution in the SolutionCache file cache if there is one
+    # returns: dict with the seed, the coordinates and the arc assignments
+    # {(i, j, k): value} of the solution, which are empty if there is none
+    seed(s)
+    numLocs = 5
+    locs = list(range(1, numLocs + 1))
+    itmBnds = [0, 4]
+
+    x = dict([(i, round(random() * (itmBnds[1] - itmBnds[0]) + itmBnds[0], 2)) for i in locs])
+    y = dict([(i, round(random() * (itmBnds[1] - itmBnds[0]) + itmBnds[0], 2)) for i in locs])
+    x['O'] = 2
+    y['O'] = 2
+
+    vrp = veh_rout_prob.VRProb(LOCS=locs, ncurr=n_veh, x=x, y=y, maxdist=distcap, useall=useall)
+
+    tol = pow(pow(2, -20), 2.0 / 3.0)
+    opts = {"Tol": tol, "Interval": 1000, }
+    if cache is not None:
+        opts["Cache"] = SolutionCache(cache)
+
+    prob = formulate(vrp, options=opts)
+    xopt = solve(prob, options=opts)
+
+    assignments = get_assignments(prob, xopt, opts["Tol"]) if xopt is not None else {}
+    return {"seed": s, "locs": locs, "x": x, "y": y, "tol": prob.tol, "assignments": assignments}
 
 
 class Problem(object):
@@ -14,69 +45,41 @@ class Problem(object):
         self.distcap = distcap
         self.useall = useall
 
-    def run_problem(self, seeds, nrow, ncol, name):
-        fig, axs = plt.subplots(nrow, ncol)
-        for (ax, s) in zip(axs.flatten(), seeds):
-            print(s)
-            seed(s)
-            numLocs = 5
-            locs = list(range(1, numLocs + 1))
-            itmBnds = [0, 4]
-
-            x = dict([(i, round(random() * (itmBnds[1] - itmBnds[0]) + itmBnds[0], 2)) for i in locs])
-            y = dict([(i, round(random() * (itmBnds[1] - itmBnds[0]) + itmBnds[0], 2)) for i in locs])
-            x['O'] = 2
-            y['O'] = 2
-
-            vrp = VRProb(LOCS=locs, ncurr=self.n_veh, x=x, y=y, maxdist=self.distcap, useall=self.useall)
-
-            tol = pow(pow(2, -20), 2.0 / 3.0)
-            opts = {"Tol": tol, "Interval": 1000, }
-
-            prob = formulate(vrp, options=opts)
-            xopt = solve_and_display(prob, options=opts)
-
-            assignments = get_assignments(prob, xopt, opts["Tol"])
-            vrp.setSolution(assignments, prob.tol)
-            vrp.displaySolution(ax, name, s, title="Solution", showProb=False)
-
-        return fig
-
-def run():
-
-    prob1 = Problem(5)
-    fig1 = prob1.run_problem([1, 5, 23, 42, 1721, 6174], 3, 2, 'One')
-
-    prob2 = Problem(5, distcap=6)
-    fig2 = prob2.run_problem([1, 5, 23, 42, 1721, 6174], 3, 2, 'Two')
-
-    prob3 = Problem(3, useall=True)
-    fig3 = prob3.run_problem([1, 5, 23, 42, 1721, 6174], 3, 2, 'Three')
-
-    with PdfPages('outputA.pdf') as pdf:
-        pdf.savefig(fig1)
-        plt.close()
-        pdf.savefig(fig2)
-        plt.close()
-        pdf.savefig(fig3)
-
-    # # I split these as my code did not like having so many charts open at once
-    # prob1 = Problem(5)
-    # fig1 = prob1.run_problem([1006, 1007, 1008, 1010, 1012, 1013], 3, 2, 'One')
-    #
-    # prob2 = Problem(5, distcap=6)
-    # fig2 = prob2.run_problem([1006, 1007, 1008, 1010, 1012, 1013], 3, 2, 'Two')
-    #
-    # prob3 = Problem(3, useall=True)
-    # fig3 = prob3.run_problem([1006, 1007, 1008, 1010, 1012, 1013], 3, 2, 'Three')
-    #
-    # with PdfPages('outputB.pdf') as pdf:
-    #     pdf.savefig(fig1)
-    #     plt.close()
-    #     pdf.savefig(fig2)
-    #     plt.close()
-    #     pdf.savefig(fig3)
-    #     plt.close()
+    def run_problem(self, seeds, workers=None, cache=None):
+        # Solves every seed in a pool of worker processes, in seed order
+        args = [(self.n_veh, self.distcap, self.useall, s, cache) for s in seeds]
+        with Pool(workers) as pool:
+            return pool.starmap(solve_seed, args, chunksize=1)
+
+    def figures(self, records, nrow, ncol, name):
+        # Draws the solutions nrow * ncol to a figure, yielding each figure once it is full
+        per_page = nrow * ncol
+        for start in range(0, len(records), per_page):
+            fig, axs = plt.subplots(nrow, ncol, squeeze=False)
+            for (ax, record) in zip(axs.flatten(), records[start:start + per_page]):
+                vrp = VRProb(LOCS=record["locs"], ncurr=self.n_veh, x=record["x"], y=record["y"],
+                             maxdist=self.distcap, useall=self.useall)
+                vrp.setSolution(record["assignments"], record["tol"])
+                vrp.displaySolution(ax, name, record["seed"], title="Solution", showProb=False)
+            yield fig
+
+
+def run(seeds=(1, 5, 23, 42, 1721, 6174), filename='outputA.pdf', workers=None, cache=CACHEPATH):
+
+    problems = [(Problem(5), 'One'),
+                (Problem(5, distcap=6), 'Two'),
+                (Problem(3, useall=True), 'Three')]
+
+    # Solve everything first, then draw and save one page at a time so only one chart is ever open
+    records = [prob.run_problem(seeds, workers, cache) for prob, name in problems]
+
+    with PdfPages(filename) as pdf:
+        for (prob, name), recs in zip(problems, records):
+            for fig in prob.figures(recs, 3, 2, name):
+                pdf.savefig(fig)
+                plt.close(fig)
+
 
 if __name__ == '__main__':
     run()
+    run([1006, 1007, 1008, 1010, 1012, 1013], 'outputB.pdf')
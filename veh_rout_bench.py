@@ -0,0 +1,1233 @@
+"""Benchmarks for the vehicle routing code.
+
+Run a single benchmark with
+
+    python veh_rout_bench.py <name> [sizes...]
+
+or with no arguments to list the available benchmarks. Each benchmark
+prints one row per configuration and returns its rows as a list of
+dicts so it can also be driven from other scripts.
+
+The scaling benchmark sweeps seeded random instances and can save its
+results and compare them with a saved baseline, exiting with status 1
+if any case regressed:
+
+    python veh_rout_bench.py scaling --output baseline.json
+    python veh_rout_bench.py scaling --baseline baseline.json --threshold 0.25
+"""
+
+# Import builtins.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from itertools import product
+from math import ceil, sqrt
+from random import randint, random, seed
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Import locally.
+from veh_rout_prob import VRProb
+
+# The veh_rout_test.py cases as (num_locations, num_vehicles, max_dist,
+# use_all_vehicles, seed_n).
+TEST_CASES = {
+    1: (5, 1, None, False, 0),
+    2: (10, 1, None, False, 0),
+    3: (10, 2, None, True, 0),
+    4: (8, 3, None, False, 1),
+    5: (8, 2, 10, False, 0),
+    6: (8, 2, 20, False, 0),
+    7: (13, 3, 25, True, 0),
+    8: (13, 3, 25, False, 0),
+    9: (6, 3, None, True, 0),
+    10: (6, 3, None, False, 5),
+}
+
+
+def random_instance(
+        num_locations: int, seed_n: int = 0, scale: float = 10
+) -> Tuple[List[int], Dict, Dict]:
+    """
+    Generates a seeded random instance the same way veh_rout_test does.
+    :param int num_locations: The number of locations besides the depot.
+    :param int seed_n: The random seed number.
+    :param float scale: Coordinates are drawn from [0, scale).
+    :rtype: Tuple[List[int], Dict, Dict]
+    :return: The locations and their x and y coordinates, with the
+        depot 'O' in the centre.
+    """
+    locations = list(range(1, num_locations + 1))
+    seed(seed_n)
+    x = {i: random() * scale for i in locations}
+    y = {i: random() * scale for i in locations}
+    x['O'] = scale / 2
+    y['O'] = scale / 2
+    return locations, x, y
+
+
+def cvrp_instance(
+        num_locations: int, seed_n: int = 0, depot: str = 'central',
+        route_size: float = 4
+) -> Tuple[List[int], Dict, Dict, Dict, int]:
+    """
+    Generates a seeded random instance in the style of the CVRPLIB X
+    instances (Uchoa et al.): customers scattered over a 1000 x 1000
+    grid, demands drawn from [1, 10] and a capacity that fits about
+    route_size average customers into a vehicle.
+    :param int num_locations: The number of locations besides the depot.
+    :param int seed_n: The random seed number.
+    :param str depot: 'central' for the depot in the centre of the
+        grid, 'random' for anywhere on it.
+    :param float route_size: The average number of customers a vehicle
+        can carry.
+    :rtype: Tuple[List[int], Dict, Dict, Dict, int]
+    :return: The locations, their x and y coordinates, their demands and
+        the vehicle capacity.
+    """
+    locations = list(range(1, num_locations + 1))
+    seed(seed_n)
+    x = {i: randint(0, 1000) for i in locations}
+    y = {i: randint(0, 1000) for i in locations}
+    if depot == 'central':
+        x['O'], y['O'] = 500, 500
+    else:
+        x['O'], y['O'] = randint(0, 1000), randint(0, 1000)
+    demand = {i: randint(1, 10) for i in locations}
+    capacity = max(max(demand.values()),
+                   ceil(route_size * sum(demand.values()) / num_locations))
+    return locations, x, y, demand, capacity
+
+
+def vrptw_instance(
+        num_locations: int, seed_n: int = 0, width: Optional[float] = None,
+        horizon: float = 60, service: float = 1
+) -> Tuple[List[int], Dict, Dict, Dict, Dict]:
+    """
+    Generates a seeded random instance with time windows in the style of
+    the Solomon instances: random_instance's locations, each customer's
+    window centred on a random time it can be reached at from the depot
+    and still get back by the horizon, so that serving every customer on
+    a route of its own is on time.
+    :param int num_locations: The number of locations besides the depot.
+    :param int seed_n: The random seed number.
+    :param Optional[float] width: The width of the windows, as wide as
+        the horizon allows if None.
+    :param float horizon: When the depot closes.
+    :param float service: The service time at each customer.
+    :rtype: Tuple[List[int], Dict, Dict, Dict, Dict]
+    :return: The locations, their x and y coordinates, their windows and
+        their service times.
+    """
+    locations, x, y = random_instance(num_locations, seed_n)
+    windows = {'O': (0, horizon)}
+    for i in locations:
+        trip = sqrt((x[i] - x['O']) ** 2 + (y[i] - y['O']) ** 2)
+        latest = horizon - service - trip
+        if width is None:
+            windows[i] = (0, latest)
+        else:
+            centre = trip + random() * (latest - trip)
+            windows[i] = (max(0, centre - width / 2), min(latest, centre + width / 2))
+    return locations, x, y, windows, dict((i, service) for i in locations)
+
+
+def measure(func: Callable, *args, **kwargs) -> Tuple[object, float, int]:
+    """
+    Runs func twice: once for its wall-clock time and once under
+    tracemalloc for its peak memory, so tracing does not skew the time.
+    :rtype: Tuple[object, float, int]
+    :return: The result, the wall-clock time in seconds and the peak
+        traced memory in bytes.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+@contextmanager
+def quiet():
+    """Silences stdout, including the output DIP writes from C++."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def solve_case(
+        num_locations: int,
+        num_vehicles: int = 1,
+        max_dist: Optional[float] = None,
+        use_all_vehicles: bool = False,
+        seed_n: int = 0,
+        options: Optional[Dict] = None
+) -> Dict:
+    """
+    Formulates and solves one seeded instance quietly.
+    :param Optional[Dict] options: Entries added to myopts for this run.
+    :rtype: Dict
+    :return: The build and solve times (s), the number of
+        branch-and-bound nodes, the cut statistics and the objective
+        (None if infeasible), with the callback statistics the solver
+        records.
+    """
+    locations, x, y = random_instance(num_locations, seed_n)
+    start = time.perf_counter()
+    vrp = VRProb(
+        LOCS=locations, ncurr=num_vehicles, x=x, y=y, maxdist=max_dist,
+        useall=use_all_vehicles
+    )
+    return solve_vrp(vrp, options, start)
+
+
+def solve_vrp(
+        vrp: VRProb, options: Optional[Dict] = None,
+        start: Optional[float] = None
+) -> Dict:
+    """
+    Formulates and solves vrp quietly, as solve_case does.
+    :param Optional[Dict] options: Entries added to myopts for this run.
+    :param Optional[float] start: When the build started, now if None.
+    :rtype: Dict
+    :return: The rows solve_case returns.
+    """
+    from crou060_veh_rout_func import formulate, myopts, solve
+
+    opts = dict(myopts)
+    opts.update(options or {})
+    if start is None:
+        start = time.perf_counter()
+    with quiet():
+        prob = formulate(vrp, options=opts)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    with quiet():
+        solution = solve(prob, options=opts)
+    return {
+        'variables': len(prob.variables()),
+        'constraints': len(prob.constraints),
+        'build_time': build,
+        'solve_time': time.perf_counter() - start,
+        'nodes': prob.nodes,
+        'cuts': prob.cut_stats['Cuts'],
+        'warm_start': prob.warm_stats,
+        'local_search': prob.ls_stats if prob.local_search is not None else None,
+        'arcs': prob.arc_stats,
+        'preprocess': prob.pre_stats,
+        'callbacks': prob.stats.as_dict(),
+        'objective': None if solution is None else prob.objective.value(),
+    }
+
+
+def _dict_dist(x: Dict, y: Dict) -> Dict:
+    # The original tuple-keyed build from VRProb, kept as the reference.
+    dist = {}
+    for i in x.keys():
+        for j in x.keys():
+            dist[i, j] = sqrt((x[i] - x[j])**2 + (y[i] - y[j])**2)
+    return dist
+
+
+def bench_dist(sizes: Tuple[int, ...] = (100, 500, 1000, 2000)) -> List[Dict]:
+    """
+    Compares building the distance data as a tuple-keyed dict against
+    the dense matrix VRProb now holds.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :rtype: List[Dict]
+    :return: One row per size with times (s) and peak memory (MB).
+    """
+    rows = []
+    print(f"{'n':>6} {'dict s':>9} {'dict MB':>9} {'numpy s':>9} "
+          f"{'numpy MB':>9} {'speedup':>8}")
+    for n in sizes:
+        locations, x, y = random_instance(n)
+        _, dict_time, dict_peak = measure(_dict_dist, x, y)
+        _, np_time, np_peak = measure(
+            VRProb, LOCS=locations, ncurr=1, x=x, y=y
+        )
+        row = {
+            'n': n,
+            'dict_time': dict_time,
+            'dict_mb': dict_peak / 2**20,
+            'numpy_time': np_time,
+            'numpy_mb': np_peak / 2**20,
+        }
+        rows.append(row)
+        print(f"{n:>6} {dict_time:>9.3f} {row['dict_mb']:>9.1f} "
+              f"{np_time:>9.4f} {row['numpy_mb']:>9.1f} "
+              f"{dict_time / np_time:>7.0f}x")
+    return rows
+
+
+def bench_separation(cases: Tuple[int, ...] = tuple(TEST_CASES)) -> List[Dict]:
+    """
+    Compares integer-only subtour separation against exact min-cut
+    separation of fractional LP solutions on the veh_rout_test cases.
+    :param Tuple[int, ...] cases: Which TEST_CASES to run.
+    :rtype: List[Dict]
+    :return: One row per case and separation mode.
+    """
+    rows = []
+    print(f"{'test':>4} {'mode':>8} {'nodes':>7} {'cuts':>6} "
+          f"{'solve s':>9} {'objective':>10}")
+    for case in cases:
+        for mode in ('Integer', 'MinCut'):
+            row = solve_case(*TEST_CASES[case], options={'Separation': mode})
+            row.update(test=case, mode=mode)
+            rows.append(row)
+            objective = row['objective']
+            print(f"{case:>4} {mode:>8} {row['nodes']:>7} {row['cuts']:>6} "
+                  f"{row['solve_time']:>9.2f} "
+                  f"{'infeasible' if objective is None else round(objective, 4):>10}")
+    return rows
+
+
+def bench_formulation(
+        sizes: Tuple[int, ...] = (6, 8, 10, 12), num_vehicles: int = 10
+) -> List[Dict]:
+    """
+    Compares the three-index and two-index formulations on a
+    homogeneous fleet with no distance cap.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param int num_vehicles: The fleet size.
+    :rtype: List[Dict]
+    :return: One row per size and formulation.
+    """
+    rows = []
+    print(f"{'n':>4} {'formulation':>11} {'vars':>6} {'rows':>6} "
+          f"{'build s':>8} {'solve s':>8} {'objective':>10}")
+    for n in sizes:
+        for formulation in ('ThreeIndex', 'TwoIndex'):
+            row = solve_case(n, num_vehicles, options={
+                'Formulation': formulation, 'Separation': 'MinCut'
+            })
+            row.update(n=n, formulation=formulation)
+            rows.append(row)
+            print(f"{n:>4} {formulation:>11} {row['variables']:>6} "
+                  f"{row['constraints']:>6} {row['build_time']:>8.3f} "
+                  f"{row['solve_time']:>8.2f} {row['objective']:>10.4f}")
+    return rows
+
+
+def bench_neighbours(
+        sizes: Tuple[int, ...] = (10, 15, 20, 25), num_vehicles: int = 3,
+        neighbours: int = 8
+) -> List[Dict]:
+    """
+    Compares the model over every arc with the one over each customer's
+    nearest neighbours, including the pruned arcs the reduced cost
+    check puts back.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param int num_vehicles: The fleet size.
+    :param int neighbours: The number of nearest neighbours kept.
+    :rtype: List[Dict]
+    :return: One row per size and arc set.
+    """
+    rows = []
+    print(f"{'n':>4} {'k':>4} {'vars':>6} {'arcs':>6} {'restored':>8} "
+          f"{'build s':>8} {'solve s':>8} {'objective':>10}")
+    for n in sizes:
+        for k in (None, neighbours):
+            options = {'Separation': 'MinCut'}
+            if k is not None:
+                options['Neighbours'] = k
+            row = solve_case(n, num_vehicles, options=options)
+            row.update(n=n, neighbours=k)
+            rows.append(row)
+            print(f"{n:>4} {'all' if k is None else k:>4} {row['variables']:>6} "
+                  f"{row['arcs']['Arcs']:>6} {row['arcs']['Restored']:>8} "
+                  f"{row['build_time']:>8.3f} {row['solve_time']:>8.2f} "
+                  f"{row['objective']:>10.4f}")
+    return rows
+
+
+def bench_distcap(
+        caps: Tuple[float, ...] = (5, 10, 15, 20, 25), num_locations: int = 8,
+        num_vehicles: int = 2
+) -> List[Dict]:
+    """
+    Reports the arcs and variables the distance cap preprocessing
+    removes, the fleet-size lower bound, and whether they prove the
+    instance infeasible before Dippy is called, as the cap is tightened.
+    :param Tuple[float, ...] caps: Distance caps to try.
+    :param int num_locations: The number of locations besides the depot.
+    :param int num_vehicles: The fleet size.
+    :rtype: List[Dict]
+    :return: One row per cap.
+    """
+    rows = []
+    print(f"{'cap':>6} {'removed':>8} {'vars cut':>8} {'vars':>6} "
+          f"{'unreached':>9} {'fleet':>5} {'solve s':>8} {'objective':>10}")
+    for cap in caps:
+        row = solve_case(num_locations, num_vehicles, cap, options={
+            'Separation': 'MinCut'
+        })
+        row.update(max_dist=cap)
+        rows.append(row)
+        stats = row['preprocess']
+        objective = row['objective']
+        print(f"{cap:>6} {stats['Removed']:>8} {stats['Variables']:>8} "
+              f"{row['variables']:>6} {len(stats['Unreachable']):>9} "
+              f"{stats['FleetBound']:>5} "
+              f"{row['solve_time']:>8.2f} "
+              f"{'infeasible' if objective is None else round(objective, 4):>10}")
+    return rows
+
+
+def bench_symmetry(
+        fleets: Tuple[int, ...] = (2, 3, 4, 5), num_locations: int = 8,
+        max_dist: float = 20
+) -> List[Dict]:
+    """
+    Compares the three-index model with and without symmetry breaking
+    as the number of identical vehicles grows.
+    :param Tuple[int, ...] fleets: Numbers of vehicles to try.
+    :param int num_locations: The number of locations besides the depot.
+    :param float max_dist: The maximum distance a vehicle can travel.
+    :rtype: List[Dict]
+    :return: One row per fleet size and setting.
+    """
+    rows = []
+    print(f"{'vehs':>4} {'symmetry':>8} {'nodes':>7} {'solve s':>8} "
+          f"{'objective':>10}")
+    for num_vehicles in fleets:
+        for symmetry in (False, True):
+            row = solve_case(num_locations, num_vehicles, max_dist,
+                             options={'Symmetry': symmetry})
+            row.update(vehicles=num_vehicles, symmetry=symmetry)
+            rows.append(row)
+            print(f"{num_vehicles:>4} {str(symmetry):>8} {row['nodes']:>7} "
+                  f"{row['solve_time']:>8.2f} {row['objective']:>10.4f}")
+    return rows
+
+
+def bench_decomp(
+        sizes: Tuple[int, ...] = (8, 10, 12), num_vehicles: int = 6,
+        max_dist: float = 15
+) -> List[Dict]:
+    """
+    Compares the compact three-index model, separated with min cuts,
+    against the Dantzig-Wolfe decomposition with labelling pricing on
+    distance-capped instances. Both break vehicle symmetry.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param int num_vehicles: The fleet size.
+    :param float max_dist: The maximum distance a vehicle can travel.
+    :rtype: List[Dict]
+    :return: One row per size and mode.
+    """
+    rows = []
+    modes = {
+        'Compact': {'Separation': 'MinCut', 'Symmetry': True},
+        'Decomp': {'Decomp': True, 'Symmetry': True},
+    }
+    print(f"{'n':>4} {'mode':>8} {'nodes':>7} {'solve s':>8} "
+          f"{'objective':>10}")
+    for n in sizes:
+        for mode, options in modes.items():
+            row = solve_case(n, num_vehicles, max_dist, options=options)
+            row.update(n=n, mode=mode)
+            rows.append(row)
+            objective = row['objective']
+            print(f"{n:>4} {mode:>8} {row['nodes']:>7} "
+                  f"{row['solve_time']:>8.2f} "
+                  f"{'infeasible' if objective is None else round(objective, 4):>10}")
+    return rows
+
+
+def bench_savings(
+        sizes: Tuple[int, ...] = (100, 1000, 2000, 5000), max_dist: float = 40
+) -> List[Dict]:
+    """
+    Times the Clarke-Wright savings constructor on large instances.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param float max_dist: The maximum distance a vehicle can travel.
+    :rtype: List[Dict]
+    :return: One row per size.
+    """
+    from veh_rout_heur import route_length, savings
+
+    rows = []
+    print(f"{'n':>6} {'ms':>8} {'routes':>7} {'distance':>10}")
+    for n in sizes:
+        locations, x, y = random_instance(n)
+        vrp = VRProb(LOCS=locations, ncurr=n, x=x, y=y, maxdist=max_dist)
+        start = time.perf_counter()
+        routes = savings(vrp)
+        elapsed = time.perf_counter() - start
+        row = {
+            'n': n,
+            'time': elapsed,
+            'routes': len(routes),
+            'distance': sum(route_length(vrp, route) for route in routes),
+        }
+        rows.append(row)
+        print(f"{n:>6} {1000 * elapsed:>8.1f} {row['routes']:>7} "
+              f"{row['distance']:>10.2f}")
+    return rows
+
+
+def bench_warmstart(cases: Tuple[int, ...] = tuple(TEST_CASES)) -> List[Dict]:
+    """
+    Solves the veh_rout_test cases with and without the savings warm
+    start, reporting its gap to the optimum and the nodes it saves.
+    :param Tuple[int, ...] cases: Which TEST_CASES to run.
+    :rtype: List[Dict]
+    :return: One row per case and setting.
+    """
+    rows = []
+    print(f"{'test':>4} {'warm':>5} {'nodes':>7} {'solve s':>8} "
+          f"{'objective':>10} {'heuristic':>10} {'gap':>7}")
+    for case in cases:
+        for warm in (False, True):
+            row = solve_case(*TEST_CASES[case], options={
+                'Separation': 'MinCut', 'WarmStart': warm
+            })
+            row.update(test=case, warm=warm)
+            rows.append(row)
+            objective = row['objective']
+            stats = row['warm_start'] or {}
+            heuristic = stats.get('Objective')
+            gap = stats.get('Gap')
+            print(f"{case:>4} {str(warm):>5} {row['nodes']:>7} "
+                  f"{row['solve_time']:>8.2f} "
+                  f"{'infeasible' if objective is None else round(objective, 4):>10} "
+                  f"{'-' if heuristic is None else round(heuristic, 4):>10} "
+                  f"{'-' if gap is None else f'{gap:.1%}':>7}")
+    return rows
+
+
+def bench_backends(cases: Tuple[int, ...] = tuple(TEST_CASES)) -> List[Dict]:
+    """
+    Solves the veh_rout_test cases with Dippy and with the CBC
+    lazy-constraint loop, checking they reach the same objective.
+    :param Tuple[int, ...] cases: Which TEST_CASES to run.
+    :rtype: List[Dict]
+    :return: One row per case and backend.
+    """
+    rows = []
+    print(f"{'test':>4} {'backend':>7} {'cuts':>6} {'solve s':>8} "
+          f"{'objective':>10} {'same':>5}")
+    for case in cases:
+        objectives = []
+        for backend in ('Dippy', 'CBC'):
+            row = solve_case(*TEST_CASES[case], options={
+                'Backend': backend, 'Separation': 'MinCut', 'AllCuts': True
+            })
+            row.update(test=case, backend=backend)
+            rows.append(row)
+            objective = row['objective']
+            objectives.append(objective)
+            same = objective == objectives[0] or (
+                None not in objectives and abs(objective - objectives[0]) < 1e-6)
+            print(f"{case:>4} {backend:>7} {row['cuts']:>6} "
+                  f"{row['solve_time']:>8.2f} "
+                  f"{'infeasible' if objective is None else round(objective, 4):>10} "
+                  f"{str(same):>5}")
+    return rows
+
+
+def bench_compact(
+        sizes: Tuple[int, ...] = (6, 8, 10, 12),
+        fleets: Tuple[int, ...] = (1, 2, 3), backend: str = 'Dippy'
+) -> List[Dict]:
+    """
+    Compares callback subtour separation (min-cut, all cuts per round)
+    with the compact MTZ and single-commodity flow formulations, which
+    are solved in one shot, over instance and fleet sizes.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param Tuple[int, ...] fleets: Fleet sizes to try.
+    :param str backend: The solver backend.
+    :rtype: List[Dict]
+    :return: One row per size, fleet size and formulation, with the
+        time spent in the callbacks (s) and whether it was the fastest.
+    """
+    rows = []
+    print(f"{'n':>4} {'vehs':>4} {'subtours':>8} {'vars':>6} {'rows':>6} "
+          f"{'callback s':>10} {'solve s':>8} {'objective':>10} {'best':>5}")
+    for n, num_vehicles in product(sizes, fleets):
+        group = []
+        for subtours in ('Cuts', 'MTZ', 'Flow'):
+            options = {'Backend': backend, 'Subtours': subtours}
+            if subtours == 'Cuts':
+                options.update(Separation='MinCut', AllCuts=True)
+            row = solve_case(n, num_vehicles, options=options)
+            row.update(n=n, vehicles=num_vehicles, subtours=subtours,
+                       callback_time=sum(entry['Time'] for entry in row['callbacks'].values()))
+            group.append(row)
+        fastest = min(row['solve_time'] for row in group)
+        for row in group:
+            row['best'] = row['solve_time'] == fastest
+            rows.append(row)
+            objective = row['objective']
+            print(f"{n:>4} {num_vehicles:>4} {row['subtours']:>8} "
+                  f"{row['variables']:>6} {row['constraints']:>6} "
+                  f"{row['callback_time']:>10.3f} {row['solve_time']:>8.2f} "
+                  f"{'infeasible' if objective is None else round(objective, 4):>10} "
+                  f"{str(row['best']):>5}")
+    return rows
+
+
+def bench_cvrp(
+        sizes: Tuple[int, ...] = (8, 10, 12), seeds: Tuple[int, ...] = (0, 1),
+        backend: str = 'Dippy'
+) -> List[Dict]:
+    """
+    Solves CVRPLIB-style capacitated instances (see cvrp_instance) with
+    the two-index formulation, where capacity is only enforced by the
+    rounded capacity cuts, and the three-index formulation, where every
+    vehicle has a load constraint, each with the cuts separated on
+    fractional solutions or only on the loads of integer ones.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param Tuple[int, ...] seeds: Random seeds to try.
+    :param str backend: The solver backend.
+    :rtype: List[Dict]
+    :return: One row per size, seed, formulation and setting.
+    """
+    rows = []
+    print(f"{'n':>4} {'seed':>4} {'vehs':>4} {'formulation':>11} "
+          f"{'fractional':>10} {'nodes':>6} {'cuts':>5} {'solve s':>8} "
+          f"{'objective':>10}")
+    for n, seed_n in product(sizes, seeds):
+        locations, x, y, demand, capacity = cvrp_instance(n, seed_n)
+        # One vehicle more than the demand needs, so there is room to spare
+        num_vehicles = ceil(sum(demand.values()) / capacity) + 1
+        vrp = VRProb(LOCS=locations, ncurr=num_vehicles, x=x, y=y,
+                     demand=demand, capacity=capacity)
+        for formulation, fractional in product(('TwoIndex', 'ThreeIndex'), (True, False)):
+            row = solve_vrp(vrp, options={
+                'Backend': backend, 'Formulation': formulation,
+                'Separation': 'MinCut', 'AllCuts': True,
+                'CapacityCuts': fractional
+            })
+            row.update(n=n, seed=seed_n, vehicles=num_vehicles,
+                       formulation=formulation, capacity_cuts=fractional)
+            rows.append(row)
+            objective = row['objective']
+            print(f"{n:>4} {seed_n:>4} {num_vehicles:>4} {formulation:>11} "
+                  f"{str(fractional):>10} {row['nodes']:>6} {row['cuts']:>5} "
+                  f"{row['solve_time']:>8.2f} "
+                  f"{'infeasible' if objective is None else round(objective, 4):>10}")
+    return rows
+
+
+def bench_windows(
+        sizes: Tuple[int, ...] = (10, 15, 20),
+        widths: Tuple[Optional[float], ...] = (None, 20, 10, 5),
+        backend: str = 'Dippy'
+) -> List[Dict]:
+    """
+    Solves instances with time windows (see vrptw_instance) of narrowing
+    widths with the two-index formulation, reporting how many of the
+    arcs time window preprocessing keeps, how much smaller that makes
+    the model, and the solve with and without infeasible path cuts.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param Tuple[Optional[float], ...] widths: Window widths to try, None
+        for windows as wide as the horizon allows.
+    :param str backend: The solver backend.
+    :rtype: List[Dict]
+    :return: One row per size, width and setting.
+    """
+    rows = []
+    print(f"{'n':>4} {'width':>6} {'arcs':>6} {'shrink':>6} {'paths':>5} "
+          f"{'nodes':>6} {'cuts':>5} {'solve s':>8} {'objective':>10}")
+    for n, width in product(sizes, widths):
+        locations, x, y, windows, service = vrptw_instance(n, width=width)
+        # A vehicle per customer, so that every instance is feasible
+        vrp = VRProb(LOCS=locations, ncurr=n, x=x, y=y, windows=windows,
+                     service=service)
+        for paths in (True, False):
+            row = solve_vrp(vrp, options={
+                'Backend': backend, 'Formulation': 'TwoIndex',
+                'Separation': 'MinCut', 'AllCuts': True, 'PathCuts': paths
+            })
+            arcs = row['arcs']['Arcs']
+            row.update(n=n, width=width, path_cuts=paths,
+                       shrink=n * (n + 1) / arcs if arcs else None)
+            rows.append(row)
+            objective = row['objective']
+            print(f"{n:>4} {'-' if width is None else width:>6} {arcs:>6} "
+                  f"{'-' if row['shrink'] is None else round(row['shrink'], 2):>6} "
+                  f"{str(paths):>5} {row['nodes']:>6} {row['cuts']:>5} "
+                  f"{row['solve_time']:>8.2f} "
+                  f"{'infeasible' if objective is None else round(objective, 4):>10}")
+    return rows
+
+
+def bench_localsearch(cases: Tuple[int, ...] = tuple(TEST_CASES)) -> List[Dict]:
+    """
+    Solves the veh_rout_test cases with and without the local search
+    heuristic, reporting its calls, time per call and incumbents found.
+    :param Tuple[int, ...] cases: Which TEST_CASES to run.
+    :rtype: List[Dict]
+    :return: One row per case and setting.
+    """
+    rows = []
+    print(f"{'test':>4} {'ls':>5} {'nodes':>7} {'solve s':>8} "
+          f"{'objective':>10} {'calls':>6} {'ms/call':>8} {'found':>6}")
+    for case in cases:
+        for search in (False, True):
+            row = solve_case(*TEST_CASES[case], options={
+                'Separation': 'MinCut', 'LocalSearch': search
+            })
+            row.update(test=case, local_search_on=search)
+            rows.append(row)
+            objective = row['objective']
+            stats = row['local_search'] or {}
+            calls = stats.get('Calls', 0)
+            per_call = 1000 * stats['Time'] / calls if calls else None
+            print(f"{case:>4} {str(search):>5} {row['nodes']:>7} "
+                  f"{row['solve_time']:>8.2f} "
+                  f"{'infeasible' if objective is None else round(objective, 4):>10} "
+                  f"{calls:>6} "
+                  f"{'-' if per_call is None else round(per_call, 3):>8} "
+                  f"{stats.get('Incumbents', '-'):>6}")
+    return rows
+
+
+# Run in a fresh interpreter by bench_headless, printing one JSON line.
+_HEADLESS_PROBE = """
+import json, os, resource, sys, time
+start = time.perf_counter()
+import crou060_veh_rout_func as func
+imported = time.perf_counter() - start
+import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+phase = sys.argv[1]
+if phase != 'import':
+    from veh_rout_bench import quiet, random_instance
+    from veh_rout_prob import VRProb
+    locations, x, y = random_instance(int(sys.argv[2]))
+    vrp = VRProb(LOCS=locations, ncurr=2, x=x, y=y, maxdist=20)
+    with quiet():
+        prob = func.formulate(vrp, options=func.myopts)
+        xopt = func.solve(prob, options=func.myopts)
+    if phase == 'draw':
+        os.environ['MPLBACKEND'] = 'Agg'
+        vrp.setSolution(func.get_assignments(prob, xopt, prob.tol), prob.tol)
+        vrp.displaySolution()
+print(json.dumps({
+    'import_time': imported,
+    'total_time': time.perf_counter() - start,
+    'import_rss': import_rss,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'plotting': [m for m in ('matplotlib', 'networkx') if m in sys.modules],
+}))
+"""
+
+
+def bench_headless(
+        sizes: Tuple[int, ...] = (8,), repeats: int = 3
+) -> List[Dict]:
+    """
+    Measures, each in a fresh interpreter, the import time and peak RSS
+    of the solver module, of a headless formulate and solve, and of the
+    same solve followed by drawing the solution, listing the plotting
+    libraries each phase has loaded.
+    :param Tuple[int, ...] sizes: Numbers of locations to solve.
+    :param int repeats: Runs of each phase, of which the fastest is
+        reported.
+    :rtype: List[Dict]
+    :return: One row per size and phase.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    rows = []
+    print(f"{'n':>4} {'phase':>7} {'import s':>9} {'total s':>8} "
+          f"{'import MB':>10} {'peak MB':>8} {'plotting':>20}")
+    for n in sizes:
+        for phase in ('import', 'solve', 'draw'):
+            runs = []
+            for _ in range(repeats):
+                out = subprocess.run(
+                    [sys.executable, '-c', _HEADLESS_PROBE, phase, str(n)],
+                    cwd=here, capture_output=True, text=True, check=True
+                ).stdout
+                runs.append(json.loads(out.strip().splitlines()[-1]))
+            row = min(runs, key=lambda r: r['total_time'])
+            row.update(n=n, phase=phase)
+            rows.append(row)
+            # ru_maxrss is in kilobytes on Linux
+            print(f"{n:>4} {phase:>7} {row['import_time']:>9.3f} "
+                  f"{row['total_time']:>8.3f} {row['import_rss'] / 1024:>10.1f} "
+                  f"{row['rss'] / 1024:>8.1f} "
+                  f"{','.join(row['plotting']) or '-':>20}")
+    return rows
+
+
+def bench_build(
+        sizes: Tuple[int, ...] = (50, 100, 200), num_vehicles: int = 5
+) -> List[Dict]:
+    """
+    Times formulate and traces its peak memory on random instances,
+    building the model without solving it.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param int num_vehicles: The fleet size.
+    :rtype: List[Dict]
+    :return: One row per size with the build time (s) and peak memory
+        (MB).
+    """
+    from crou060_veh_rout_func import formulate, load_dippy, myopts
+
+    # Dippy's import is a one-off, not part of building a model
+    load_dippy()
+    rows = []
+    print(f"{'n':>4} {'vehs':>4} {'vars':>8} {'rows':>6} {'build s':>8} "
+          f"{'peak MB':>8}")
+    for n in sizes:
+        locations, x, y = random_instance(n)
+        vrp = VRProb(LOCS=locations, ncurr=num_vehicles, x=x, y=y)
+        with quiet():
+            prob, elapsed, peak = measure(formulate, vrp, options=dict(myopts))
+        row = {
+            'n': n,
+            'vehicles': num_vehicles,
+            'variables': len(prob.variables()),
+            'constraints': len(prob.constraints),
+            'build_time': elapsed,
+            'peak_mb': peak / 2**20,
+        }
+        rows.append(row)
+        print(f"{n:>4} {num_vehicles:>4} {row['variables']:>8} "
+              f"{row['constraints']:>6} {elapsed:>8.3f} {row['peak_mb']:>8.1f}")
+    return rows
+
+
+# What-if changes bench_reopt makes to a solved instance.
+REOPT_DELTAS = {
+    'add': lambda vrp: {'Add': {len(vrp.LOCS) + 1: (1.0, 9.0)}},
+    'remove': lambda vrp: {'Remove': [vrp.LOCS[0]]},
+    'maxdist': lambda vrp: {'MaxDist': 1.5 * max(
+        vrp.dist['O', i] + vrp.dist[i, 'O'] for i in vrp.LOCS)},
+    'vehicle': lambda vrp: {'Vehicles': len(vrp.VEHS) - 1},
+}
+
+
+def bench_reopt(
+        sizes: Tuple[int, ...] = (10, 13), num_vehicles: int = 3
+) -> List[Dict]:
+    """
+    Compares reoptimize after each of the REOPT_DELTAS with a cold
+    formulate and solve of the changed instance.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param int num_vehicles: The fleet size before the change.
+    :rtype: List[Dict]
+    :return: One row per size and change with both times (s), the
+        B&B nodes, the cuts carried over and both objectives.
+    """
+    from crou060_veh_rout_func import formulate, myopts, reoptimize, solve
+
+    opts = dict(myopts, Separation='MinCut', AllCuts=True)
+    rows = []
+    print(f"{'n':>4} {'change':>8} {'cold s':>8} {'reopt s':>8} {'nodes':>6} "
+          f"{'reopt':>6} {'cuts':>5} {'cold obj':>10} {'reopt obj':>10}")
+    for n in sizes:
+        locations, x, y = random_instance(n)
+        vrp = VRProb(LOCS=locations, ncurr=num_vehicles, x=x, y=y)
+        for change, make in REOPT_DELTAS.items():
+            delta = make(vrp)
+            start = time.perf_counter()
+            with quiet():
+                cold = formulate(vrp.applyDelta(delta), options=opts)
+                cold_solution = solve(cold, options=opts)
+            cold_time = time.perf_counter() - start
+            with quiet():
+                prob = formulate(vrp, options=opts)
+                solve(prob, options=opts)
+            start = time.perf_counter()
+            with quiet():
+                solution = reoptimize(prob, delta, options=opts)
+            row = {
+                'n': n,
+                'change': change,
+                'cold_time': cold_time,
+                'reopt_time': time.perf_counter() - start,
+                'cold_nodes': cold.nodes,
+                'reopt_nodes': prob.nodes,
+                'reopt': prob.reopt_stats,
+                'cold_objective': None if cold_solution is None else cold.objective.value(),
+                'objective': None if solution is None else prob.objective.value(),
+            }
+            rows.append(row)
+            print(f"{n:>4} {change:>8} {cold_time:>8.2f} {row['reopt_time']:>8.2f} "
+                  f"{cold.nodes:>6} {prob.nodes:>6} {prob.reopt_stats['Cuts']:>5} "
+                  f"{'infeasible' if row['cold_objective'] is None else round(row['cold_objective'], 4):>10} "
+                  f"{'infeasible' if row['objective'] is None else round(row['objective'], 4):>10}")
+    return rows
+
+
+def _callback_solutions(prob) -> Dict[str, Dict]:
+    # A feasible savings solution of prob and the same routes with every
+    # customer after the first cut off into a subtour, as {var: value}
+    # over all of prob's variables the way DIP passes solutions.
+    from crou060_veh_rout_func import routes_to_solution
+    from veh_rout_heur import savings
+
+    routes = savings(prob.vrp)
+    feasible = dict.fromkeys(prob.variables(), 0.0)
+    feasible.update(routes_to_solution(prob, routes))
+    subtours = dict(feasible)
+    for k, route in zip(prob.vrp.VEHS, sorted(routes, key=len)):
+        if len(route) < 3:
+            continue
+        for (i, j) in zip(['O'] + route, route + ['O']):
+            subtours[prob.arc_vars[i, j, k]] = 0.0
+        cycle = route[1:]
+        for (i, j) in [('O', route[0]), (route[0], 'O')] + list(zip(cycle, cycle[1:] + cycle[:1])):
+            subtours[prob.arc_vars[i, j, k]] = 1.0
+    return {'feasible': feasible, 'subtours': subtours}
+
+
+def bench_callbacks(
+        sizes: Tuple[int, ...] = (25, 50), repeats: int = 20
+) -> List[Dict]:
+    """
+    Times is_solution_feasible and generate_cuts, with min-cut
+    separation, on a feasible savings solution and on one with subtours
+    of large three-index models, next to the time DIP's own Python
+    wrapper takes to turn the solution into a dict and check it.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param int repeats: Calls timed, of which the mean is reported.
+    :rtype: List[Dict]
+    :return: One row per size and solution.
+    """
+    import crou060_veh_rout_func as func
+    from veh_rout_stats import OFF, CallbackStats
+
+    rows = []
+    print(f"{'n':>4} {'vehs':>4} {'vars':>7} {'solution':>9} "
+          f"{'dippy ms':>9} {'feasible ms':>12} {'cuts ms':>8} {'cuts':>5}")
+    for n in sizes:
+        num_vehicles = n // 10 + 1
+        locations, x, y = random_instance(n)
+        vrp = VRProb(LOCS=locations, ncurr=num_vehicles, x=x, y=y)
+        options = dict(func.myopts, Separation='MinCut', AllCuts=True)
+        with quiet():
+            prob = func.formulate(vrp, options=options)
+        prob.options = options
+        prob.stats = CallbackStats(OFF)
+        prob.cut_stats = {'Rounds': 0, 'Cuts': 0, 'Duplicates': 0, 'RoundsSaved': 0}
+        for name, sol in _callback_solutions(prob).items():
+            pairs = list(sol.items())
+            times = {}
+            for label, call in (
+                    ('dippy', lambda: set(prob.variables()).symmetric_difference(dict(pairs))),
+                    ('feasible', lambda: func.is_solution_feasible(prob, sol, prob.tol)),
+                    ('cuts', lambda: func.generate_cuts(prob, sol))):
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    prob.cut_pool = set()
+                    result = call()
+                times[label] = (time.perf_counter() - start) / repeats
+            row = {
+                'n': n,
+                'vehicles': num_vehicles,
+                'variables': len(prob.variables()),
+                'solution': name,
+                'dippy_time': times['dippy'],
+                'feasible_time': times['feasible'],
+                'cuts_time': times['cuts'],
+                'cuts': len(result or []),
+            }
+            rows.append(row)
+            print(f"{n:>4} {num_vehicles:>4} {row['variables']:>7} {name:>9} "
+                  f"{1000 * row['dippy_time']:>9.2f} "
+                  f"{1000 * row['feasible_time']:>12.2f} "
+                  f"{1000 * row['cuts_time']:>8.2f} {row['cuts']:>5}")
+    return rows
+
+
+# DipProblem methods DIP calls back into Python, which callback_timer times.
+CALLBACKS = (
+    'solveRelaxed', 'isUserFeasible', 'generateCuts', 'solveHeuristics',
+    'generateInitVars', 'chooseBranchSet', 'postProcessNode',
+)
+
+
+@contextmanager
+def callback_timer():
+    """
+    Times every call DIP makes back into the Python callbacks of any
+    DipProblem while the context is open.
+    :return: A dict whose 'Calls' and 'Time' (s) entries add up the
+        callbacks made so far.
+    """
+    import crou060_veh_rout_func as func
+
+    func.load_dippy()
+    cls = func.dippy.DipProblem
+    totals = {'Calls': 0, 'Time': 0.0}
+
+    def timed(method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                totals['Calls'] += 1
+                totals['Time'] += time.perf_counter() - start
+        return wrapper
+
+    saved = {name: getattr(cls, name) for name in CALLBACKS}
+    for name, method in saved.items():
+        setattr(cls, name, timed(method))
+    try:
+        yield totals
+    finally:
+        for name, method in saved.items():
+            setattr(cls, name, method)
+
+
+# The default scaling sweep; every combination is solved for each seed.
+SCALING_GRID = {
+    'num_locations': (6, 8, 10),
+    'num_vehicles': (2, 3),
+    'max_dist': (None, 25),
+    'use_all_vehicles': (False, True),
+    'seed_n': (0, 1),
+}
+# The measurements compared against a baseline, with the smallest
+# increase in each that counts as a regression, so timer noise on runs
+# of a few milliseconds is not flagged.
+SCALING_METRICS = {
+    'build_time': 0.05,
+    'solve_time': 0.05,
+    'callback_time': 0.05,
+    'peak_mb': 2.0,
+    'nodes': 0,
+    'cuts': 0,
+}
+
+# Run in a fresh interpreter by run_scaling_case, printing one JSON line.
+_SCALING_PROBE = """
+import json, resource, sys
+from veh_rout_bench import callback_timer, solve_case
+case = json.loads(sys.argv[1])
+with callback_timer() as callbacks:
+    row = solve_case(**case)
+print(json.dumps({
+    'build_time': row['build_time'],
+    'solve_time': row['solve_time'],
+    'nodes': row['nodes'],
+    'cuts': row['cuts'],
+    'callbacks': callbacks['Calls'],
+    'callback_time': callbacks['Time'],
+    'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'objective': row['objective'],
+}))
+"""
+
+
+def scaling_key(case: Dict) -> str:
+    """
+    :rtype: str
+    :return: The label a scaling case is matched on in a baseline.
+    """
+    return 'n={num_locations} k={num_vehicles} cap={max_dist} ' \
+           'all={use_all_vehicles} seed={seed_n}'.format(**case)
+
+
+def run_scaling_case(case: Dict, timeout: float = 300) -> Dict:
+    """
+    Solves one scaling case in a fresh interpreter, so its peak memory,
+    including what DIP allocates in C++, is its own.
+    :param Dict case: solve_case arguments.
+    :param float timeout: Seconds before the solve is abandoned.
+    :rtype: Dict
+    :return: The case with its 'status' ('ok', 'timeout' or 'error')
+        and, if it finished, its measurements.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    row = dict(case, key=scaling_key(case))
+    try:
+        out = subprocess.run(
+            [sys.executable, '-c', _SCALING_PROBE, json.dumps(case)],
+            cwd=here, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        row['status'] = 'timeout'
+        return row
+    lines = out.stdout.strip().splitlines()
+    if out.returncode != 0 or not lines:
+        row['status'] = 'error'
+        row['error'] = out.stderr.strip().splitlines()[-1:] or ['no output']
+        return row
+    row.update(json.loads(lines[-1]), status='ok')
+    return row
+
+
+def compare_baseline(
+        rows: List[Dict], baseline: List[Dict], threshold: float = 0.25
+) -> List[Dict]:
+    """
+    Compares scaling rows with the rows of a saved baseline.
+    :param List[Dict] rows: The rows of this run.
+    :param List[Dict] baseline: The rows saved by an earlier run.
+    :param float threshold: The relative increase in a metric, beyond
+        its floor in SCALING_METRICS, that counts as a regression.
+    :rtype: List[Dict]
+    :return: One entry per regression, changed objective or case that
+        no longer finishes, with the key, metric and both values.
+    """
+    before = {row['key']: row for row in baseline}
+    flags = []
+    for row in rows:
+        old = before.get(row['key'])
+        if old is None or old['status'] != 'ok':
+            continue
+        if row['status'] != 'ok':
+            flags.append({'key': row['key'], 'metric': 'status',
+                          'baseline': old['status'], 'value': row['status']})
+            continue
+        if (old['objective'] is None) != (row['objective'] is None) or (
+                old['objective'] is not None and
+                abs(old['objective'] - row['objective']) > 1e-6):
+            flags.append({'key': row['key'], 'metric': 'objective',
+                          'baseline': old['objective'], 'value': row['objective']})
+        for metric, floor in SCALING_METRICS.items():
+            if row[metric] > old[metric] * (1 + threshold) and \
+                    row[metric] - old[metric] > floor:
+                flags.append({'key': row['key'], 'metric': metric,
+                              'baseline': old[metric], 'value': row[metric]})
+    return flags
+
+
+def bench_scaling(
+        sizes: Tuple[int, ...] = SCALING_GRID['num_locations'],
+        grid: Optional[Dict] = None,
+        output: Optional[str] = None,
+        baseline: Optional[str] = None,
+        threshold: float = 0.25,
+        timeout: float = 300
+) -> List[Dict]:
+    """
+    Sweeps the number of locations, vehicles, the distance cap and
+    use_all_vehicles over seeded random instances, recording the build
+    and solve times, nodes, cuts, time spent in the Python callbacks and
+    peak memory of each solve.
+    :param Tuple[int, ...] sizes: Numbers of locations to try.
+    :param Optional[Dict] grid: Values to sweep for the other
+        solve_case arguments, replacing those in SCALING_GRID; the
+        numbers of locations are always taken from sizes.
+    :param Optional[str] output: A JSON file to save the rows in, which
+        can serve as a later run's baseline.
+    :param Optional[str] baseline: A JSON file saved by an earlier run
+        to compare against.
+    :param float threshold: The relative increase counted as a
+        regression.
+    :param float timeout: Seconds before a solve is abandoned.
+    :rtype: List[Dict]
+    :return: One row per case; any regressions flagged against the
+        baseline are in the 'regressions' entry of the rows they flag.
+    """
+    grid = dict(SCALING_GRID, **(grid or {}))
+    grid['num_locations'] = tuple(sizes)
+    names = list(grid)
+    cases = [dict(zip(names, values)) for values in product(*grid.values())]
+    before = []
+    if baseline is not None:
+        with open(baseline) as f:
+            before = json.load(f)['rows']
+
+    rows = []
+    print(f"{'n':>4} {'vehs':>4} {'cap':>5} {'all':>5} {'seed':>4} "
+          f"{'build s':>8} {'solve s':>8} {'nodes':>6} {'cuts':>5} "
+          f"{'cb s':>7} {'peak MB':>8} {'objective':>10}")
+    for case in cases:
+        row = run_scaling_case(case, timeout)
+        row['regressions'] = [flag['metric'] for flag in
+                              compare_baseline([row], before, threshold)]
+        rows.append(row)
+        prefix = (f"{case['num_locations']:>4} {case['num_vehicles']:>4} "
+                  f"{str(case['max_dist']):>5} {str(case['use_all_vehicles']):>5} "
+                  f"{case['seed_n']:>4}")
+        if row['status'] != 'ok':
+            print(f"{prefix} {row['status']:>8}"
+                  f"{'  REGRESSED' if row['regressions'] else ''}")
+            continue
+        objective = row['objective']
+        print(f"{prefix} {row['build_time']:>8.3f} {row['solve_time']:>8.2f} "
+              f"{row['nodes']:>6} {row['cuts']:>5} {row['callback_time']:>7.2f} "
+              f"{row['peak_mb']:>8.1f} "
+              f"{'infeasible' if objective is None else round(objective, 4):>10}"
+              f"{'  REGRESSED: ' + ', '.join(row['regressions']) if row['regressions'] else ''}")
+
+    if baseline is not None:
+        flagged = [row for row in rows if row['regressions']]
+        print(f"{len(flagged)} of {len(rows)} cases regressed beyond "
+              f"{threshold:.0%} against {baseline}")
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'grid': grid,
+                'rows': rows,
+            }, f, indent=1)
+    return rows
+
+
+BENCHMARKS = {
+    'dist': bench_dist,
+    'separation': bench_separation,
+    'formulation': bench_formulation,
+    'neighbours': bench_neighbours,
+    'distcap': bench_distcap,
+    'symmetry': bench_symmetry,
+    'decomp': bench_decomp,
+    'savings': bench_savings,
+    'warmstart': bench_warmstart,
+    'headless': bench_headless,
+    'localsearch': bench_localsearch,
+    'scaling': bench_scaling,
+    'callbacks': bench_callbacks,
+    'build': bench_build,
+    'reopt': bench_reopt,
+    'backends': bench_backends,
+    'compact': bench_compact,
+    'cvrp': bench_cvrp,
+    'windows': bench_windows,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Runs one of the vehicle routing benchmarks.")
+    parser.add_argument('name', nargs='?', choices=list(BENCHMARKS),
+                        help="the benchmark to run, listed if left out")
+    parser.add_argument('sizes', nargs='*', type=int,
+                        help="the sizes, cases or caps to run it on")
+    parser.add_argument('--output', default=None,
+                        help="scaling: save the rows to this JSON file")
+    parser.add_argument('--baseline', default=None,
+                        help="scaling: flag regressions against this JSON file")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="scaling: relative increase flagged as a regression")
+    args = parser.parse_args()
+    if args.name is None:
+        print("Benchmarks:", ", ".join(BENCHMARKS))
+        sys.exit(0)
+    kwargs = {}
+    if args.name == 'scaling':
+        kwargs = dict(output=args.output, baseline=args.baseline,
+                      threshold=args.threshold)
+    elif args.output or args.baseline:
+        parser.error("--output and --baseline only apply to the scaling benchmark")
+    sizes = (tuple(args.sizes),) if args.sizes else ()
+    rows = BENCHMARKS[args.name](*sizes, **kwargs)
+    if args.name == 'scaling' and any(row['regressions'] for row in rows):
+        sys.exit(1)
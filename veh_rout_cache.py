@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+import numpy as np
+
+# Where solutions are cached unless another path is given
+CACHEPATH = os.path.join(".veh_rout_cache", "solutions.sqlite")
+# Options that don't change the solution: only optimal solutions and proofs of infeasibility are cached,
+# so a time limit, the threads and the statistics kept can't change what is stored
+UNCACHED = ("Cache", "Interval", "Display", "Stats", "Profile", "Threads", "TimeLimit")
+
+
+def fingerprint(vrp, options):
+    # Stable hash of everything a solution depends on: the locations,
+    # coordinates, distance matrix, fleet size, distance cap, whether
+    # every vehicle is used, the demands and capacity, the time windows
+    # and service times and the solver options
+    h = hashlib.sha256()
+    h.update(repr(vrp.EXTLOCS).encode())
+    for coords in (vrp.x, vrp.y):
+        items = sorted((repr(i), v) for i, v in coords.items()) if coords is not None else None
+        h.update(repr(items).encode())
+    h.update(np.ascontiguousarray(vrp.distmat, dtype='<f8').tobytes())
+    h.update(repr((len(vrp.VEHS), vrp.distcap, vrp.allused)).encode())
+    demand = sorted((repr(i), d) for i, d in vrp.demand.items()) if vrp.demand is not None else None
+    h.update(repr((demand, vrp.capacity)).encode())
+    if vrp.windows is not None:
+        h.update(repr([(repr(i), vrp.windows[i], vrp.service[i]) for i in vrp.EXTLOCS]).encode())
+    opts = sorted((k, v) for k, v in options.items() if k not in UNCACHED)
+    h.update(json.dumps(opts, default=repr).encode())
+    return h.hexdigest()
+
+
+class SolutionCache:
+    """Solutions kept in SQLite by instance fingerprint, evicting the
+    least recently used once the stored solutions pass max_bytes. The
+    hit and miss counters live in the database, so worker processes
+    sharing a cache add to the same counts."""
+
+    def __init__(self, path=CACHEPATH, max_bytes=64 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, payload TEXT, "
+                       "size INTEGER, used REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+            db.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)",
+                           [("Hits",), ("Misses",), ("Stores",), ("Evictions",)])
+
+    @contextmanager
+    def connect(self):
+        # One transaction on a connection that is closed afterwards, as the
+        # connection's own context manager commits but leaves it open.
+        # Several processes may share the file, so wait for their locks
+        with closing(sqlite3.connect(self.path, timeout=60)) as db:
+            with db:
+                yield db
+
+    def get(self, key):
+        # returns: the record stored under key, or None, counting a hit or a miss
+        with self.connect() as db:
+            row = db.execute("SELECT payload FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                db.execute("UPDATE counters SET value = value + 1 WHERE name = 'Misses'")
+                return None
+            db.execute("UPDATE solutions SET used = ? WHERE key = ?", (time.time(), key))
+            db.execute("UPDATE counters SET value = value + 1 WHERE name = 'Hits'")
+        return json.loads(row[0])
+
+    def put(self, key, record):
+        # Stores the JSON-serialisable record under key, then evicts the least
+        # recently used records until the cache fits in max_bytes again
+        payload = json.dumps(record)
+        with self.connect() as db:
+            db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                       (key, payload, len(payload), time.time()))
+            db.execute("UPDATE counters SET value = value + 1 WHERE name = 'Stores'")
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+            evicted = 0
+            for old, size in db.execute("SELECT key, size FROM solutions ORDER BY used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute("DELETE FROM solutions WHERE key = ?", (old,))
+                total -= size
+                evicted += 1
+            db.execute("UPDATE counters SET value = value + ? WHERE name = 'Evictions'", (evicted,))
+
+    @property
+    def stats(self):
+        # The counters, with the number of solutions and bytes stored
+        with self.connect() as db:
+            stats = dict(db.execute("SELECT name, value FROM counters").fetchall())
+            stats["Entries"], stats["Bytes"] = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM solutions").fetchone()
+        return stats
+
+    def clear(self):
+        # Forgets every solution and resets the counters
+        with self.connect() as db:
+            db.execute("DELETE FROM solutions")
+            db.execute("UPDATE counters SET value = 0")
@@ -4,6 +4,7 @@ seed(1)
 
 from veh_rout_prob import VRProb
 from crou060_veh_rout_func import myopts, formulate, solve_and_display, get_assignments
+from veh_rout_cache import SolutionCache
 
 if __name__ == '__main__':
   # Python starts here
@@ -25,7 +26,7 @@ if __name__ == '__main__':
   
   vrp.drawProblem()
   
-  opts = myopts
+  opts = dict(myopts, Cache=SolutionCache())
   
   prob = formulate(vrp, options=opts)
   
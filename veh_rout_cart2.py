@@ -4,6 +4,7 @@ seed(1)
 
 from veh_rout_prob import VRProb
 from crou060_veh_rout_func import myopts, formulate, solve_and_display, get_assignments
+from veh_rout_cache import SolutionCache
 
 if __name__ == '__main__':
   # Python starts here
@@ -30,6 +31,7 @@ if __name__ == '__main__':
   opts = {
       "Tol": tol,
       "Interval": 1000,
+      "Cache": SolutionCache(),
       }
   
   prob = formulate(vrp, options=opts)
@@ -0,0 +1,85 @@
+import os
+import re
+import tempfile
+import time
+
+from pulp import PULP_CBC_CMD, LpMinimize, LpProblem, LpStatus, LpStatusNotSolved, LpStatusOptimal
+
+
+class CbcProblem(LpProblem):
+    """The model as the CBC backend solves it, with the attributes of a
+    DipProblem that formulate and solve use. CBC solves the compact
+    model, so there are no relaxation blocks and no tree to draw."""
+
+    # Left unset when the model itself rules out subtours
+    is_solution_feasible = None
+    generate_cuts = None
+
+    def __init__(self, name="NoName", display_mode="none", display_interval=None):
+        LpProblem.__init__(self, name, LpMinimize)
+        self.display_mode = "none"
+        self.display_interval = display_interval
+        self.relaxed_solver = None
+
+
+def solve_cbc(prob, options):
+    # returns: (status, message, primals, duals) as dippy.Solve does,
+    # solving prob with PuLP's bundled CBC and adding the cuts
+    # generate_cuts finds in each integer solution until
+    # is_solution_feasible accepts one, or just once if there are no
+    # callbacks. The cuts go into a copy of the model, so prob itself
+    # is left as formulate built it
+    lp = LpProblem(prob.name, prob.sense)
+    lp += prob.objective
+    for con in prob.constraints.values():
+        lp += con
+    # CBC prunes any node whose bound can't beat a known objective value, as Dippy's BestKnownUB does. The
+    # cuts only raise the objective, so the cutoff holds in every round. PuLP puts a "-" before each option,
+    # so the value goes in the same string as its name
+    cbc_options = ["cutoff %r" % float(options["Cutoff"])] if "Cutoff" in options else []
+    # CBC only reports its node count in its log, which is read back after each round
+    fd, log_path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    solver = PULP_CBC_CMD(msg=False, threads=options.get("Threads"), timeLimit=options.get("TimeLimit"),
+                          warmStart=prob.warm_start is not None, options=cbc_options, logPath=log_path)
+    prob.cbc_stats = {"Solves": 0, "Time": 0.0}
+
+    try:
+        while True:
+            # The warm start satisfies every cut, so CBC can start from it in every round
+            if prob.warm_start is not None:
+                for var in lp.variables():
+                    var.varValue = prob.warm_start.get(var, 0)
+            start = time.perf_counter()
+            status = lp.solve(solver)
+            prob.cbc_stats["Solves"] += 1
+            prob.cbc_stats["Time"] += time.perf_counter() - start
+            prob.nodes += read_nodes(log_path)
+            if status != LpStatusOptimal:
+                break
+
+            if prob.is_solution_feasible is None:
+                break
+            sol = dict([(var, var.varValue if var.varValue is not None else 0.0) for var in lp.variables()])
+            if prob.is_solution_feasible(prob, sol, prob.tol):
+                break
+            cons = prob.generate_cuts(prob, sol)
+            # Every cut on a rejected solution has already been sent, so it can't be cut off
+            if not cons:
+                status = LpStatusNotSolved
+                break
+            for con in cons:
+                lp += con
+    finally:
+        os.remove(log_path)
+
+    primals = dict([(var.name, var.varValue) for var in lp.variables()]) if status == LpStatusOptimal else None
+    return status, LpStatus[status], primals, None
+
+
+def read_nodes(path):
+    # returns: the branch-and-bound nodes CBC enumerated, from the log it
+    # wrote to path, which has no count when the model is infeasible
+    with open(path) as f:
+        match = re.search(r"^Enumerated nodes:\s*(\d+)", f.read(), re.MULTILINE)
+    return int(match.group(1)) if match else 0
@@ -0,0 +1,434 @@
+from collections import deque
+
+import numpy as np
+
+from veh_rout_prob import DISTTOL, LOADTOL
+
+
+def route_length(vrp, route):
+    # Length of 'O' -> route[0] -> ... -> route[-1] -> 'O'
+    if not route:
+        return 0.0
+    idx = [vrp.index['O']] + [vrp.index[i] for i in route] + [vrp.index['O']]
+    return float(vrp.distmat[idx[:-1], idx[1:]].sum())
+
+
+def route_load(vrp, route):
+    # Total demand of the customers on route, 0 if vrp has no demands
+    if vrp.demand is None:
+        return 0
+    return sum(vrp.demand[i] for i in route)
+
+
+def route_times(vrp, route):
+    # Earliest start of service at each customer on route, or None if
+    # one of them, or the return to 'O', misses its time window. Every
+    # route is on time if vrp has no windows
+    if vrp.windows is None:
+        return []
+    times = []
+    t = vrp.windows['O'][0]
+    stops = ['O'] + list(route) + ['O']
+    for i, j in zip(stops[:-1], stops[1:]):
+        t = max(vrp.windows[j][0], t + vrp.service[i] + vrp.dist[i, j])
+        if t > vrp.windows[j][1] + DISTTOL:
+            return None
+        times.append(t)
+    return times[:-1]
+
+
+def load_room(vrp):
+    # Most a route can load, inf if vrp has no capacity
+    return np.inf if vrp.capacity is None else vrp.capacity + LOADTOL
+
+
+def route_arcs(route):
+    # Arcs of the route, leaving and returning to the depot
+    stops = ['O'] + list(route) + ['O']
+    return list(zip(stops[:-1], stops[1:]))
+
+
+def savings(vrp, neighbours=30):
+    # Clarke-Wright parallel savings routes for vrp, or None if the
+    # heuristic can't fit the customers into the fleet within distcap,
+    # capacity and the time windows. Routes are only reversed to join
+    # them when there are no windows
+    # Savings are only computed to each customer's nearest neighbours,
+    # so the work is O(n * neighbours log n) after the distance matrix
+    n = len(vrp.LOCS)
+    nveh = len(vrp.VEHS)
+    cap = np.inf if vrp.distcap is None else vrp.distcap + DISTTOL
+    room = load_room(vrp)
+    # EXTLOCS puts the customers in rows 0, ..., n - 1 of distmat and the depot last
+    depot = vrp.index['O']
+    dist = vrp.distmat[:n, :n]
+    out = vrp.distmat[depot, :n]
+    back = vrp.distmat[:n, depot]
+    demand = [route_load(vrp, [i]) for i in vrp.LOCS]
+
+    # Every customer starts on its own out-and-back route
+    if np.any(out + back > cap) or any(d > room for d in demand) or (vrp.allused and n < nveh):
+        return None
+    if any(route_times(vrp, [i]) is None for i in vrp.LOCS):
+        return None
+    timed = vrp.windows is not None
+    if n == 0:
+        return []
+    routes = dict([(a, deque([a])) for a in range(n)])
+    owner = list(range(n))
+    length = (out + back).tolist()
+    load = demand[:]
+
+    # Savings s(a, b) = d(a, O) + d(O, b) - d(a, b) of joining a -> b, over the nearest neighbours
+    k = min(neighbours + 1, n)
+    near = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    a = np.repeat(np.arange(n), k)
+    b = near.ravel()
+    other = a != b
+    a, b = a[other], b[other]
+    saving = back[a] + out[b] - dist[a, b]
+    order = np.argsort(-saving, kind='stable')
+
+    # With every vehicle in use, stop merging once there is one route per vehicle
+    nroutes = n
+    for a, b, s in zip(a[order].tolist(), b[order].tolist(), saving[order].tolist()):
+        if vrp.allused and nroutes == nveh:
+            break
+        ra, rb = owner[a], owner[b]
+        if ra == rb:
+            continue
+        A, B = routes[ra], routes[rb]
+
+        # a has to end its route and b has to start its route, reversing them if need be
+        if A[-1] != a:
+            if A[0] != a or timed:
+                continue
+            A.reverse()
+        if B[0] != b:
+            if B[-1] != b or timed:
+                continue
+            B.reverse()
+        joined = length[ra] + length[rb] - s
+        if joined > cap or load[ra] + load[rb] > room:
+            continue
+        if timed and route_times(vrp, [vrp.LOCS[c] for c in A] + [vrp.LOCS[c] for c in B]) is None:
+            continue
+
+        # Keep the joined route under the label of the longer one, so few customers are relabelled
+        if len(A) >= len(B):
+            A.extend(B)
+            keep, drop = ra, rb
+        else:
+            B.extendleft(reversed(A))
+            keep, drop = rb, ra
+        for c in routes[drop]:
+            owner[c] = keep
+        length[keep] = joined
+        load[keep] += load[drop]
+        del routes[drop]
+        nroutes -= 1
+
+    if nroutes > nveh:
+        return None
+
+    # Number the routes by their lowest-indexed customer
+    result = sorted(routes.values(), key=min)
+    return [[vrp.LOCS[a] for a in route] for route in result]
+
+
+def round_routes(vrp, weights, tol=1e-6):
+    # Rounds fractional arc values {(i, j): x} to routes for vrp by
+    # following the heaviest unused arc out of the depot and then out of
+    # each customer, and inserting any customers left over where they
+    # are cheapest. Returns None if they don't fit the fleet
+    nveh = len(vrp.VEHS)
+    cap = np.inf if vrp.distcap is None else vrp.distcap + DISTTOL
+    room = load_room(vrp)
+    succ = dict([(i, []) for i in vrp.EXTLOCS])
+    for (i, j), x in weights.items():
+        if x > tol:
+            succ[i].append((x, j))
+    for i in succ:
+        succ[i].sort(key=lambda s: -s[0])
+
+    routes = []
+    visited = set()
+    while len(routes) < nveh:
+        route = []
+        length = 0.0
+        load = 0
+        i = 'O'
+        while True:
+            nxt = [j for (x, j) in succ[i] if j not in visited]
+            if not nxt or nxt[0] == 'O':
+                break
+            j = nxt[0]
+            if length + vrp.dist[i, j] + vrp.dist[j, 'O'] > cap or load + route_load(vrp, [j]) > room:
+                break
+            if route_times(vrp, route + [j]) is None:
+                break
+            length += vrp.dist[i, j]
+            load += route_load(vrp, [j])
+            route.append(j)
+            visited.add(j)
+            i = j
+        if not route:
+            break
+        routes.append(route)
+
+    # Cheapest feasible insertion of the rest, opening new routes while there are vehicles left
+    return insert_cheapest(vrp, routes, [u for u in vrp.LOCS if u not in visited])
+
+
+def insert_cheapest(vrp, routes, customers):
+    # Inserts each of customers into routes where it adds the least
+    # distance within distcap, capacity and the time windows, opening new
+    # routes while there are vehicles left. Returns None if one doesn't
+    # fit the fleet
+    nveh = len(vrp.VEHS)
+    cap = np.inf if vrp.distcap is None else vrp.distcap + DISTTOL
+    room = load_room(vrp)
+    for u in customers:
+        if route_load(vrp, [u]) > room:
+            return None
+        best = None
+        for r, route in enumerate(routes):
+            if route_load(vrp, route + [u]) > room:
+                continue
+            length = route_length(vrp, route)
+            stops = ['O'] + route + ['O']
+            for p in range(len(stops) - 1):
+                delta = vrp.dist[stops[p], u] + vrp.dist[u, stops[p + 1]] - vrp.dist[stops[p], stops[p + 1]]
+                if length + delta <= cap and (best is None or delta < best[0]) and \
+                        route_times(vrp, route[:p] + [u] + route[p:]) is not None:
+                    best = (delta, r, p)
+        if len(routes) < nveh and vrp.dist['O', u] + vrp.dist[u, 'O'] <= cap and \
+                route_times(vrp, [u]) is not None and \
+                (best is None or vrp.dist['O', u] + vrp.dist[u, 'O'] < best[0]):
+            routes.append([u])
+        elif best is not None:
+            routes[best[1]].insert(best[2], u)
+        else:
+            return None
+
+    # Every vehicle in use means one customer at least on every route
+    while vrp.allused and len(routes) < nveh:
+        donors = [route for route in routes if len(route) > 1]
+        if not donors:
+            return None
+        routes.append([donors[0].pop()])
+
+    return routes
+
+
+def repair_routes(vrp, routes):
+    # Fits routes from before a change to vrp back into it: customers
+    # that are gone are dropped, routes over distcap or capacity or
+    # missing a time window shed the customers saving the most distance,
+    # the shortest routes are broken up while there are more routes than
+    # vehicles, and then the shed and new customers are put back by
+    # cheapest insertion. Returns None if they don't fit the fleet
+    cap = np.inf if vrp.distcap is None else vrp.distcap + DISTTOL
+    room = load_room(vrp)
+    kept = set(vrp.LOCS)
+    routes = [[i for i in route if i in kept] for route in routes]
+    routes = [route for route in routes if route]
+    pending = []
+
+    for route in routes:
+        while route_length(vrp, route) > cap or route_load(vrp, route) > room or \
+                route_times(vrp, route) is None:
+            stops = ['O'] + route + ['O']
+            saved = [vrp.dist[stops[p], stops[p + 1]] + vrp.dist[stops[p + 1], stops[p + 2]] -
+                     vrp.dist[stops[p], stops[p + 2]] for p in range(len(route))]
+            pending.append(route.pop(int(np.argmax(saved))))
+    routes = [route for route in routes if route]
+
+    routes.sort(key=lambda route: route_length(vrp, route))
+    while len(routes) > len(vrp.VEHS):
+        pending.extend(routes.pop(0))
+
+    visited = set(pending).union(*routes)
+    pending.extend(i for i in vrp.LOCS if i not in visited)
+    return insert_cheapest(vrp, routes, pending)
+
+
+class LocalSearch:
+    """Improves routes with 2-opt, or-opt, relocate and cross-exchange
+    moves. Every move is priced from distance deltas, in time bounded by
+    the longest segment it moves, and only applied if the routes it
+    changes stay within distcap and capacity, and, when there are time
+    windows, are still on time."""
+
+    # Longest segment moved by or-opt and swapped by cross-exchange
+    OR_OPT_MAX = 3
+    CROSS_MAX = 2
+
+    def __init__(self, vrp, eps=1e-9):
+        self.vrp = vrp
+        self.D = vrp.distmat.tolist()
+        self.depot = vrp.index['O']
+        self.cap = np.inf if vrp.distcap is None else vrp.distcap + DISTTOL
+        self.room = load_room(vrp)
+        # Demand at each location index, the depot's being 0
+        self.demand = [route_load(vrp, [i]) if i != 'O' else 0 for i in vrp.EXTLOCS]
+        self.allused = vrp.allused
+        # Windows and service times by location index, checked by walking the changed routes
+        self.timed = vrp.windows is not None
+        if self.timed:
+            self.early = [vrp.windows[i][0] for i in vrp.EXTLOCS]
+            self.late = [vrp.windows[i][1] + DISTTOL for i in vrp.EXTLOCS]
+            self.service = [vrp.service[i] for i in vrp.EXTLOCS]
+        # Reversing a segment only keeps its length when distances are symmetric
+        self.symmetric = bool(np.allclose(vrp.distmat, vrp.distmat.T))
+        self.eps = eps
+
+    def length(self, route):
+        D = self.D
+        stops = [self.depot] + route + [self.depot]
+        return sum(D[stops[p]][stops[p + 1]] for p in range(len(stops) - 1))
+
+    def load(self, route):
+        return sum(self.demand[i] for i in route)
+
+    def on_time(self, route):
+        if not self.timed:
+            return True
+        D, depot = self.D, self.depot
+        t = self.early[depot]
+        i = depot
+        for j in route + [depot]:
+            t = max(self.early[j], t + self.service[i] + D[i][j])
+            if t > self.late[j]:
+                return False
+            i = j
+        return True
+
+    def improve(self, routes, max_passes=100):
+        # returns: (routes, counts) with counts of the improving moves applied by type
+        index = self.vrp.index
+        routes = [[index[i] for i in route] for route in routes]
+        lengths = [self.length(route) for route in routes]
+        loads = [self.load(route) for route in routes]
+        counts = {"2-opt": 0, "or-opt": 0, "relocate": 0, "exchange": 0}
+
+        for _ in range(max_passes):
+            move = (self.two_opt(routes) or self.relocate(routes, lengths, loads) or
+                    self.exchange(routes, lengths, loads))
+            if move is None:
+                break
+            counts[move] += 1
+            routes = [route for route in routes if route]
+            lengths = [self.length(route) for route in routes]
+            loads = [self.load(route) for route in routes]
+
+        locs = self.vrp.EXTLOCS
+        return [[locs[i] for i in route] for route in routes], counts
+
+    def two_opt(self, routes):
+        # Reverse route[s..t] when that shortens the route
+        if not self.symmetric:
+            return None
+        D, depot = self.D, self.depot
+        for route in routes:
+            n = len(route)
+            for s in range(n - 1):
+                a = route[s - 1] if s > 0 else depot
+                for t in range(s + 1, n):
+                    b = route[t + 1] if t + 1 < n else depot
+                    delta = D[a][route[t]] + D[route[s]][b] - D[a][route[s]] - D[route[t]][b]
+                    if delta < -self.eps:
+                        if not self.on_time(route[:s] + route[s:t + 1][::-1] + route[t + 1:]):
+                            continue
+                        route[s:t + 1] = route[s:t + 1][::-1]
+                        return "2-opt"
+        return None
+
+    def relocate(self, routes, lengths, loads):
+        # Move a segment of up to OR_OPT_MAX customers, possibly reversed, to its best place in any route
+        D, depot, cap = self.D, self.depot, self.cap
+        for r1, route in enumerate(routes):
+            n = len(route)
+            for L in range(1, min(self.OR_OPT_MAX, n) + 1):
+                # Emptying a route is only allowed when vehicles may stay at the depot
+                if L == n and self.allused:
+                    continue
+                for s in range(n - L + 1):
+                    seg = route[s:s + L]
+                    a = route[s - 1] if s > 0 else depot
+                    b = route[s + L] if s + L < n else depot
+                    removed = D[a][b] - D[a][seg[0]] - D[seg[-1]][b]
+                    inner = self.length(seg) - D[depot][seg[0]] - D[seg[-1]][depot]
+                    moving = self.load(seg)
+                    for r2, other in enumerate(routes):
+                        if r2 != r1 and loads[r2] + moving > self.room:
+                            continue
+                        rest = route[:s] + route[s + L:] if r2 == r1 else other
+                        stops = [depot] + rest + [depot]
+                        for p in range(len(stops) - 1):
+                            c, d = stops[p], stops[p + 1]
+                            if r2 == r1 and p == s:
+                                continue
+                            for rev in ((False, True) if self.symmetric and L > 1 else (False,)):
+                                first, last = (seg[-1], seg[0]) if rev else (seg[0], seg[-1])
+                                added = D[c][first] + D[last][d] - D[c][d]
+                                if removed + added >= -self.eps:
+                                    continue
+                                if r2 == r1:
+                                    if lengths[r1] + removed + added > cap:
+                                        continue
+                                elif lengths[r2] + added + inner > cap:
+                                    continue
+                                moved = seg[::-1] if rev else seg
+                                if self.timed:
+                                    if r2 == r1:
+                                        if not self.on_time(rest[:p] + moved + rest[p:]):
+                                            continue
+                                    elif not (self.on_time(route[:s] + route[s + L:]) and
+                                              self.on_time(other[:p] + moved + other[p:])):
+                                        continue
+                                if r2 == r1:
+                                    route[:] = rest[:p] + moved + rest[p:]
+                                else:
+                                    del route[s:s + L]
+                                    other[p:p] = moved
+                                return "relocate" if L == 1 else "or-opt"
+        return None
+
+    def exchange(self, routes, lengths, loads):
+        # Swap segments of up to CROSS_MAX customers between two routes
+        D, depot, cap = self.D, self.depot, self.cap
+        for r1 in range(len(routes)):
+            for r2 in range(r1 + 1, len(routes)):
+                R1, R2 = routes[r1], routes[r2]
+                for L1 in range(1, min(self.CROSS_MAX, len(R1)) + 1):
+                    for L2 in range(1, min(self.CROSS_MAX, len(R2)) + 1):
+                        for s1 in range(len(R1) - L1 + 1):
+                            seg1 = R1[s1:s1 + L1]
+                            a1 = R1[s1 - 1] if s1 > 0 else depot
+                            b1 = R1[s1 + L1] if s1 + L1 < len(R1) else depot
+                            # The arcs inside a segment move with it, so they count on both routes
+                            in1 = sum(D[u][v] for u, v in zip(seg1[:-1], seg1[1:]))
+                            for s2 in range(len(R2) - L2 + 1):
+                                seg2 = R2[s2:s2 + L2]
+                                a2 = R2[s2 - 1] if s2 > 0 else depot
+                                b2 = R2[s2 + L2] if s2 + L2 < len(R2) else depot
+                                in2 = sum(D[u][v] for u, v in zip(seg2[:-1], seg2[1:]))
+                                d1 = (D[a1][seg2[0]] + D[seg2[-1]][b1] + in2 -
+                                      D[a1][seg1[0]] - D[seg1[-1]][b1] - in1)
+                                d2 = (D[a2][seg1[0]] + D[seg1[-1]][b2] + in1 -
+                                      D[a2][seg2[0]] - D[seg2[-1]][b2] - in2)
+                                if d1 + d2 >= -self.eps:
+                                    continue
+                                if lengths[r1] + d1 > cap or lengths[r2] + d2 > cap:
+                                    continue
+                                shift = self.load(seg2) - self.load(seg1)
+                                if loads[r1] + shift > self.room or loads[r2] - shift > self.room:
+                                    continue
+                                if not (self.on_time(R1[:s1] + seg2 + R1[s1 + L1:]) and
+                                        self.on_time(R2[:s2] + seg1 + R2[s2 + L2:])):
+                                    continue
+                                R1[s1:s1 + L1] = seg2
+                                R2[s2:s2 + L2] = seg1
+                                return "exchange"
+        return None
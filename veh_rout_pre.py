@@ -0,0 +1,204 @@
+from heapq import heappop, heappush
+
+import numpy as np
+
+from veh_rout_prob import DISTTOL, window_arrays
+
+# Most rounds of window tightening and arc removal window_arcs makes
+WINDOW_PASSES = 10
+
+
+def distcap_arcs(vrp, arcs):
+    # Removes the arcs (i, j) no route within vrp.distcap can use,
+    # because 'O' -> i -> j -> 'O' is already longer than the cap
+    # returns: (kept, report) where kept lists the arcs left in their
+    # original order and report is a dict with the number of arcs
+    # "Removed" and the "Unreachable" customers whose round trip from 'O'
+    # is over the cap on its own, any of which make vrp infeasible
+    cap = vrp.distcap + DISTTOL
+    depot = vrp.index['O']
+    dist = np.nan_to_num(vrp.distmat, nan=np.inf)
+    # Getting to and back from the depot itself costs nothing
+    out = dist[depot].copy()
+    back = dist[:, depot].copy()
+    out[depot] = back[depot] = 0.0
+
+    tails = np.array([vrp.index[i] for (i, j) in arcs], dtype=np.int64)
+    heads = np.array([vrp.index[j] for (i, j) in arcs], dtype=np.int64)
+    shortest = out[tails] + dist[tails, heads] + back[heads] if len(arcs) else np.zeros(0)
+    keep = shortest <= cap
+    kept = [arc for arc, ok in zip(arcs, keep.tolist()) if ok]
+
+    unreachable = [i for i in vrp.LOCS if out[vrp.index[i]] + back[vrp.index[i]] > cap]
+    return kept, {"Removed": len(arcs) - len(kept), "Unreachable": unreachable}
+
+
+def capacity_arcs(vrp, arcs):
+    # Removes the arcs (i, j) between customers whose demands together
+    # are more than vrp.capacity, as no vehicle can serve both
+    # returns: (kept, report) where kept lists the arcs left in their
+    # original order and report is a dict with the number of arcs
+    # "Removed" and the "Overloaded" customers whose demand is over the
+    # capacity on its own, any of which make vrp infeasible
+    demand = dict(vrp.demand)
+    demand['O'] = 0
+    kept = [(i, j) for (i, j) in arcs if demand[i] + demand[j] <= vrp.capacity]
+    overloaded = [i for i in vrp.LOCS if demand[i] > vrp.capacity]
+    return kept, {"Removed": len(arcs) - len(kept), "Overloaded": overloaded}
+
+
+def window_arcs(vrp, arcs):
+    # Removes the arcs (i, j) no route can use within the time windows,
+    # because serving i as early as possible and travelling to j already
+    # misses the latest start at j. The windows are tightened first by
+    # shortest path searches over the arcs: service can't start before
+    # the earliest arrival along any path from the depot, nor later than
+    # the latest start from which the depot can still be reached in
+    # time. Removing arcs can tighten the windows again, so the two are
+    # repeated until no arc is removed, or for WINDOW_PASSES rounds
+    # returns: (kept, report) where kept lists the arcs left in their
+    # original order and report is a dict with the number of arcs
+    # "Removed", the "Late" customers whose windows are empty once
+    # tightened, any of which make vrp infeasible, and the tightened
+    # "Windows" {i: (earliest, latest)}
+    early, late, service = window_arrays(vrp)
+    depot = vrp.index['O']
+    dist = np.nan_to_num(vrp.distmat, nan=np.inf)
+    tails = np.array([vrp.index[i] for (i, j) in arcs], dtype=np.int64)
+    heads = np.array([vrp.index[j] for (i, j) in arcs], dtype=np.int64)
+    travel = service[tails] + dist[tails, heads] if len(arcs) else np.zeros(0)
+
+    keep = early[tails] + travel <= late[heads] + DISTTOL
+    for _ in range(WINDOW_PASSES):
+        first, last = window_bounds(depot, tails[keep], heads[keep], travel[keep], early, late)
+        tighter = keep & (first[tails] + travel <= last[heads] + DISTTOL)
+        if (tighter == keep).all():
+            break
+        keep = tighter
+
+    kept = [arc for arc, ok in zip(arcs, keep.tolist()) if ok]
+    # The depot's own window is left as it is, and customers the searches never reached are late
+    late_custs = [i for i in vrp.LOCS if not np.isfinite(first[vrp.index[i]]) or
+                  first[vrp.index[i]] > last[vrp.index[i]] + DISTTOL]
+    first[depot], last[depot] = early[depot], late[depot]
+    windows = dict([(i, (float(first[vrp.index[i]]), float(max(first[vrp.index[i]], last[vrp.index[i]]))))
+                    for i in vrp.EXTLOCS])
+    return kept, {"Removed": len(arcs) - len(kept), "Late": late_custs, "Windows": windows}
+
+
+def window_bounds(depot, tails, heads, travel, early, late):
+    # Dijkstra's search out of the depot along the arcs (tails, heads),
+    # whose travel times are never negative, for the earliest start at
+    # each location, and back into the depot for the latest start, with
+    # each start kept inside its window and paths going no further from
+    # a location they reach outside it
+    # returns: (first, last) arrays of the earliest and latest starts,
+    # inf and -inf where the depot can't be reached from or get back to
+    n = len(early)
+    out = [[] for _ in range(n)]
+    into = [[] for _ in range(n)]
+    for i, j, t in zip(tails.tolist(), heads.tolist(), travel.tolist()):
+        if i != depot and j != depot:
+            out[i].append((j, t))
+            into[j].append((i, t))
+        elif i == depot:
+            out[i].append((j, t))
+        else:
+            into[j].append((i, t))
+
+    first = np.full(n, np.inf)
+    first[depot] = early[depot]
+    heap = [(first[depot], depot)]
+    while heap:
+        t, i = heappop(heap)
+        if t > first[i] or t > late[i] + DISTTOL:
+            continue
+        for j, step in out[i]:
+            start = max(early[j], t + step)
+            if start < first[j]:
+                first[j] = start
+                heappush(heap, (start, j))
+
+    last = np.full(n, -np.inf)
+    last[depot] = late[depot]
+    heap = [(-last[depot], depot)]
+    while heap:
+        t, j = heappop(heap)
+        t = -t
+        if t < last[j] or t < first[j] - DISTTOL:
+            continue
+        for i, step in into[j]:
+            start = min(late[i], t - step)
+            if start > last[i]:
+                last[i] = start
+                heappush(heap, (-start, i))
+    return first, last
+
+
+def fleet_bound(vrp, arcs):
+    # Lower bound on the number of vehicles any solution of vrp needs,
+    # using only the given arcs, from the larger of two bin-packing-style
+    # bounds when distcap is set: half the cheapest arcs into and out of
+    # every customer must fit into the routes' distance caps, and
+    # customers no arc joins in either direction need routes of their
+    # own (when the distances are metric, or else those no path of arcs
+    # joins), and when capacity is set the total demand must fit into
+    # the vehicles' capacities
+    # returns: (bound, reason) where reason explains why vrp is
+    # infeasible, or is None
+    n = len(vrp.LOCS)
+    nveh = len(vrp.VEHS)
+    if vrp.allused and n < nveh:
+        return nveh, "all {} vehicles have to be used but there are only {} customers".format(nveh, n)
+    bound = nveh if vrp.allused else min(n, 1)
+
+    if vrp.distcap is not None and n > 0:
+        dist = np.nan_to_num(vrp.distmat, nan=np.inf)
+        cheapestIn = dict([(i, np.inf) for i in vrp.EXTLOCS])
+        cheapestOut = dict([(i, np.inf) for i in vrp.EXTLOCS])
+        joined = set()
+        # Each customer's representative among those joined to it by customer arcs, for when the
+        # distances are not metric
+        group = dict([(i, i) for i in vrp.LOCS])
+        def find(i):
+            while group[i] != i:
+                group[i] = group[group[i]]
+                i = group[i]
+            return i
+        for (i, j) in arcs:
+            d = dist[vrp.index[i], vrp.index[j]]
+            cheapestOut[i] = min(cheapestOut[i], d)
+            cheapestIn[j] = min(cheapestIn[j], d)
+            joined.add(frozenset((i, j)))
+            if i != 'O' and j != 'O':
+                group[find(i)] = find(j)
+
+        # Each route's length is half the sum of the arcs into and out of the depot and its customers
+        depot = (cheapestIn['O'] + cheapestOut['O']) / 2.0
+        weight = sum((cheapestIn[i] + cheapestOut[i]) / 2.0 for i in vrp.LOCS)
+        room = vrp.distcap + DISTTOL - depot
+        if room <= 0 or not np.isfinite(weight):
+            return nveh + 1, "no route fits within the distance cap of {}".format(vrp.distcap)
+        bound = max(bound, int(np.ceil(weight / room - DISTTOL)))
+
+        # Greedily grow a set of customers that pairwise can't share a route, the furthest out first.
+        # With metric distances, two customers can only share a route if distcap_arcs left an arc
+        # between them, as going through other customers is never shorter. Otherwise a route can join
+        # them through other customers, so only customers no path of arcs joins are kept apart
+        order = sorted(vrp.LOCS, key=lambda i: -(dist[vrp.index['O'], vrp.index[i]] +
+                                                  dist[vrp.index[i], vrp.index['O']]))
+        apart = []
+        for i in order:
+            if vrp.metric:
+                if all(frozenset((i, j)) not in joined for j in apart):
+                    apart.append(i)
+            elif all(find(i) != find(j) for j in apart):
+                apart.append(i)
+        bound = max(bound, len(apart))
+
+    if vrp.capacity is not None and n > 0:
+        bound = max(bound, int(np.ceil(sum(vrp.demand.values()) / vrp.capacity - DISTTOL)))
+
+    if bound > nveh:
+        return bound, "at least {} vehicles are needed but only {} are available".format(bound, nveh)
+    return bound, None
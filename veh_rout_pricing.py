@@ -0,0 +1,160 @@
+from collections import deque
+
+import numpy as np
+
+from veh_rout_prob import DISTTOL, LOADTOL
+
+
+class LabelStore:
+    """The labels resident at one node, held in growable arrays so that
+    dominance can be checked against all of them at once."""
+    def __init__(self, dtype, size=64):
+        self.cost = np.empty(size)
+        self.dist = np.empty(size)
+        self.load = np.empty(size)
+        self.time = np.empty(size)
+        self.mask = np.empty(size, dtype=dtype)
+        self.alive = np.zeros(size, dtype=bool)
+        self.labels = []
+
+    def dominated(self, cost, dist, load, time, mask):
+        # True if a live label is cheaper, shorter, lighter, earlier and has visited a subset of mask
+        n = len(self.labels)
+        m = self.mask[:n]
+        return bool(np.any(self.alive[:n] & (self.cost[:n] <= cost) & (self.dist[:n] <= dist) &
+                           (self.load[:n] <= load) & (self.time[:n] <= time) & ((m & mask) == m)))
+
+    def add(self, label, dist, load, time):
+        # Kills the live labels that label dominates, then stores it
+        cost, mask = label[0], label[2]
+        n = len(self.labels)
+        m = self.mask[:n]
+        beaten = (self.alive[:n] & (cost <= self.cost[:n]) & (dist <= self.dist[:n]) & (load <= self.load[:n]) &
+                  (time <= self.time[:n]) & ((m & mask) == mask))
+        for pos in np.flatnonzero(beaten):
+            self.labels[pos][5] = False
+        self.alive[:n] &= ~beaten
+        if n == len(self.cost):
+            self.cost = np.resize(self.cost, 2 * n)
+            self.dist = np.resize(self.dist, 2 * n)
+            self.load = np.resize(self.load, 2 * n)
+            self.time = np.resize(self.time, 2 * n)
+            self.mask = np.resize(self.mask, 2 * n)
+            self.alive = np.resize(self.alive, 2 * n)
+        self.cost[n] = cost
+        self.dist[n] = dist
+        self.load[n] = load
+        self.time[n] = time
+        self.mask[n] = mask
+        self.alive[n] = True
+        self.labels.append(label)
+
+
+def shortest_routes(vrp, costs, maxdist=None, max_labels=100000, max_routes=10, capacity=None, windows=None):
+    # Elementary shortest 'O'-'O' routes under the arc costs, with the
+    # route distance as a resource capped by maxdist, the customers'
+    # demands as a resource capped by capacity and, if windows gives the
+    # (early, late, service) arrays of window_arrays, the start of
+    # service as a resource within the time windows, found by labelling
+    # costs: {(i, j): cost} for the arcs the vehicle may use
+    # returns: (routes, complete) where routes is a list of (cost, arcs)
+    # for up to max_routes routes in increasing cost, and complete is
+    # False if max_labels was hit so cheaper routes may have been missed
+    dist = vrp.distmat
+    index = vrp.index
+    depot = index['O']
+    capped = maxdist is not None
+    cap = maxdist + DISTTOL if capped else np.inf
+    loaded = capacity is not None
+    room = capacity + LOADTOL if loaded else np.inf
+    timed = windows is not None
+    if timed:
+        early, late, service = windows
+
+    # Visited sets are bit masks over the location indices, in int64 while they fit
+    dtype = np.int64 if len(vrp.EXTLOCS) < 63 else object
+    custs = np.array([index[u] for u in vrp.LOCS])
+    bits = np.array([1 << index[u] for u in vrp.LOCS], dtype=dtype)
+    demand = dict([(u, vrp.demand[u]) for u in vrp.LOCS]) if loaded else {}
+    demands = np.array([demand.get(u, 0) for u in vrp.LOCS], dtype=float)
+    # Distance of going from each location via each customer back to the depot
+    via = dist[:, custs] + dist[custs, depot]
+
+    # Arcs leaving each node
+    succ = dict([(i, []) for i in vrp.EXTLOCS])
+    for (i, j), c in costs.items():
+        succ[i].append((j, c))
+
+    # A label is [cost, distance, visited mask, node, parent label, alive, load, start of service].
+    # Customers that can no longer be reached within the cap, capacity or their windows count as visited,
+    # which makes dominance much stronger
+    labels = dict([(j, LabelStore(dtype)) for j in vrp.LOCS])
+    queue = deque([[0.0, 0.0, 0, 'O', None, True, 0.0, early[depot] if timed else 0.0]])
+    routes = []
+    created = 0
+    complete = True
+
+    while queue and complete:
+        label = queue.popleft()
+        if not label[5]:
+            continue
+        cost, d, mask, i, parent, alive, load, t = label
+        for j, c in succ[i]:
+
+            # Close the route at the depot, if it gets back before the depot closes
+            if j == 'O':
+                if i == 'O':
+                    continue
+                if not timed or t + service[index[i]] + dist[index[i], depot] <= late[depot] + DISTTOL:
+                    routes.append((cost + c, label))
+                continue
+
+            # Elementary routes visit each customer once, must be able to get back within the cap,
+            # can't need more than the capacity and can't start service after a window closes
+            bit = 1 << index[j]
+            if mask & bit:
+                continue
+            nd = d + dist[index[i], index[j]]
+            if nd + dist[index[j], depot] > cap:
+                continue
+            nload = load + demand.get(j, 0)
+            if nload > room:
+                continue
+            nt = max(early[index[j]], t + service[index[i]] + dist[index[i], index[j]]) if timed else 0.0
+            if timed and nt > late[index[j]] + DISTTOL:
+                continue
+            nc = cost + c
+            nmask = mask | bit
+            if capped:
+                nmask |= int(bits[nd + via[index[j]] > cap].sum())
+            if loaded:
+                nmask |= int(bits[nload + demands > room].sum())
+            if timed:
+                nmask |= int(bits[np.maximum(early[custs], nt + service[index[j]] + dist[index[j], custs]) >
+                                  late[custs] + DISTTOL].sum())
+            nres = nd if capped else 0.0
+            nheld = nload if loaded else 0.0
+
+            if labels[j].dominated(nc, nres, nheld, nt, nmask):
+                continue
+            new = [nc, nd, nmask, j, label, True, nload, nt]
+            labels[j].add(new, nres, nheld, nt)
+            queue.append(new)
+
+            created += 1
+            if created >= max_labels:
+                complete = False
+                break
+
+    # Rebuild the arcs of the cheapest routes from their labels
+    routes.sort(key=lambda r: r[0])
+    result = []
+    for cost, label in routes[:max_routes]:
+        arcs = [(label[3], 'O')]
+        while label[4] is not None:
+            arcs.append((label[4][3], label[3]))
+            label = label[4]
+        arcs.reverse()
+        result.append((cost, arcs))
+
+    return result, complete
@@ -1,37 +1,143 @@
-from math import sqrt
+from collections.abc import Mapping
 
-import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
 
 FIGSIZE    = (3, 1.5)
 FIGSTRETCH = 1.5
 NODESIZE = 100 # Default = 300
 FONTSIZE = 8   # Default = 12
+FLOWSCALE = 10**6 # maximum_flow needs integer capacities
+DISTTOL = 1e-9    # Distance or time a route may run over distcap or a window by
+LOADTOL = 1e-9    # Load a route may carry over capacity
+
+class DistView(Mapping):
+  """Read-only (i, j) -> distance view over a dense distance matrix."""
+  def __init__(self, matrix, index):
+    self.matrix = matrix
+    self.index = index
+
+  def __getitem__(self, arc):
+    i, j = arc
+    return float(self.matrix[self.index[i], self.index[j]])
+
+  def __iter__(self):
+    for i in self.index:
+      for j in self.index:
+        yield (i, j)
+
+  def __len__(self):
+    return len(self.index) ** 2
+
+def dist_matrix(x, y, locs):
+  # Euclidean distances between every pair of locs in one vectorized step
+  xs = np.array([x[i] for i in locs], dtype=np.float64)
+  ys = np.array([y[i] for i in locs], dtype=np.float64)
+  return np.hypot(xs[:, None] - xs[None, :], ys[:, None] - ys[None, :])
 
 class VRProb:
-  def __init__(self, LOCS, ncurr, x=None, y=None, dist=None, maxdist=None, useall=False):
+  def __init__(self, LOCS, ncurr, x=None, y=None, dist=None, maxdist=None, useall=False, demand=None,
+               capacity=None, windows=None, service=None):
     self.LOCS = LOCS
     self.EXTLOCS = LOCS[:]
     self.EXTLOCS.append('O')
     self.VEHS = range(1, ncurr + 1)
     self.x = x
     self.y = y
+    # Row/column of each location in distmat
+    self.index = dict([(i, n) for n, i in enumerate(self.EXTLOCS)])
     if (x is None) and (y is None) and (dist is None):
       raise Exception("No coordinates or distance matrix in VRPProb!")
     elif (dist is None):
-      dist = {}  
-      for i in x.keys():
-        for j in x.keys():
-          dist[i, j] = sqrt((x[i] - x[j])**2 + (y[i] - y[j])**2)      
-    self.dist = dist
+      self.distmat = dist_matrix(x, y, self.EXTLOCS)
+    elif isinstance(dist, np.ndarray):
+      self.distmat = np.array(dist, dtype=np.float64)
+    else:
+      # Missing pairs are left as nan rather than guessed
+      self.distmat = np.full((len(self.EXTLOCS), len(self.EXTLOCS)), np.nan)
+      for (i, j), d in dist.items():
+        self.distmat[self.index[i], self.index[j]] = d
+    self.distmat.flags.writeable = False
+    # Distances from coordinates obey the triangle inequality, which some bounds need
+    self.metric = dist is None
+    self.dist = DistView(self.distmat, self.index)
     self.fixed = ncurr
     self.allused = useall
     self.distcap = maxdist
-    
+    # Load each customer needs and each vehicle can carry, unit demands if only a capacity is given
+    if (demand is None) and (capacity is not None):
+      demand = dict([(i, 1) for i in LOCS])
+    self.demand = demand
+    self.capacity = capacity
+    # [earliest, latest] start of service and service time at each location, travel times being the
+    # distances. Locations left out are always open and served at once
+    if (windows is None) and (service is None):
+      self.windows = self.service = None
+    else:
+      self.windows = dict([(i, (0, np.inf)) for i in self.EXTLOCS])
+      self.windows.update(windows or {})
+      self.service = dict([(i, 0) for i in self.EXTLOCS])
+      self.service.update(service or {})
+
+  def applyDelta(self, delta):
+    # returns: a new VRProb with the customers in delta['Add'] ({i: (x, y)},
+    # or {i: (x, y, demand)} if there are demands) added, those in
+    # delta['Remove'] removed, and delta['MaxDist'], delta['Vehicles'] and
+    # delta['Capacity'] as the distance cap, fleet size and vehicle
+    # capacity if given. delta['Windows'] ({i: (earliest, latest)}) and
+    # delta['Service'] ({i: time}) set the time windows and service times
+    # of new or existing locations. Distances between the locations that
+    # stay are kept as they are
+    added = delta.get("Add", {})
+    removed = set(delta.get("Remove", []))
+    if added and ((self.x is None) or (self.y is None)):
+      raise Exception("Customers can only be added to a VRProb with coordinates!")
+    if ('O' in added) or ('O' in removed):
+      raise Exception("The depot can't be added or removed!")
+    if any(i in self.index for i in added) or any(i not in self.index for i in removed):
+      raise Exception("Only new customers can be added and existing ones removed!")
+    if (self.demand is not None) and any(len(added[i]) < 3 for i in added):
+      raise Exception("Customers added to a VRProb with demands need a demand too!")
+    LOCS = [i for i in self.LOCS if i not in removed] + list(added)
+    EXTLOCS = LOCS + ['O']
+    x = y = None
+    if self.x is not None and self.y is not None:
+      x = dict([(i, self.x[i]) for i in EXTLOCS if i in self.x])
+      y = dict([(i, self.y[i]) for i in EXTLOCS if i in self.y])
+      for i, point in added.items():
+        x[i] = point[0]
+        y[i] = point[1]
+    demand = None
+    if self.demand is not None:
+      demand = dict([(i, self.demand[i]) for i in LOCS if i not in added])
+      for i, point in added.items():
+        demand[i] = point[2]
+    windows = service = None
+    if (self.windows is not None) or ("Windows" in delta) or ("Service" in delta):
+      windows = dict([(i, self.windows[i]) for i in EXTLOCS if i not in added]) if self.windows else {}
+      windows.update(delta.get("Windows", {}))
+      service = dict([(i, self.service[i]) for i in EXTLOCS if i not in added]) if self.service else {}
+      service.update(delta.get("Service", {}))
+    kept = [n for n, i in enumerate(EXTLOCS) if i not in added]
+    old = [self.index[EXTLOCS[n]] for n in kept]
+    if added:
+      dist = dist_matrix(x, y, EXTLOCS)
+      dist[np.ix_(kept, kept)] = self.distmat[np.ix_(old, old)]
+    else:
+      dist = self.distmat[np.ix_(old, old)]
+    vrp = VRProb(LOCS, delta.get("Vehicles", len(self.VEHS)), x=x, y=y, dist=dist,
+                 maxdist=delta.get("MaxDist", self.distcap), useall=self.allused, demand=demand,
+                 capacity=delta.get("Capacity", self.capacity), windows=windows, service=service)
+    # Customers added by coordinates keep the distances Euclidean
+    vrp.metric = self.metric
+    return vrp
+
   def drawProblem(self):
     if (self.x is None) and (self.y is None):
       print("No (x, y)-coordinates so can't draw VRPProb!")
     else:
+      # The plotting libraries are only loaded to draw, so solving stays headless
+      import networkx as nx
+      import matplotlib.pyplot as plt
       G = nx.DiGraph()
       G.add_nodes_from(self.EXTLOCS)
       pos = dict([(i, (self.x[i], self.y[i])) for i in self.EXTLOCS])
@@ -59,6 +165,8 @@ class VRProb:
           self.assignment[k].append((i, j))
   
   def displaySolution(self, title=None, showProb=True):
+    import networkx as nx
+    import matplotlib.pyplot as plt
     colors = ['b', 'r', 'g', 'm', 'c', 'k', 'y']
     # print solution
     G = nx.DiGraph()
@@ -104,6 +212,26 @@ class VRProb:
       plt.title(title)
     plt.show()
 
+def window_arrays(vrp):
+  # returns: (early, late, service) arrays giving the earliest and latest
+  # start of service and the service time at each location, in EXTLOCS
+  # order
+  early = np.array([vrp.windows[i][0] for i in vrp.EXTLOCS], dtype=np.float64)
+  late = np.array([vrp.windows[i][1] for i in vrp.EXTLOCS], dtype=np.float64)
+  service = np.array([vrp.service[i] for i in vrp.EXTLOCS], dtype=np.float64)
+  return early, late, service
+
+def path_is_late(vrp, path, tol=0):
+  # returns: True if path, a sequence of locations, can't be served in
+  # that order within their time windows, starting no earlier than the
+  # first one opens
+  t = vrp.windows[path[0]][0]
+  for i, j in zip(path[:-1], path[1:]):
+    t = max(vrp.windows[j][0], t + vrp.service[i] + vrp.dist[i, j])
+    if t > vrp.windows[j][1] + tol:
+      return True
+  return False
+
 def get_graphs(vrp, assignments, tol):
   vehNodes = {}
   vehArcs  = {}
@@ -149,3 +277,325 @@ def get_subtour(vehNodes, vehArcs, node):
     arcs = list(arcs)
     
     return nodes, arcs
+
+def get_arc_layout(vrp, keys):
+    # returns: (tails, heads, blocks, vehs) where tails, heads and
+    # blocks are integer arrays giving, for the n-th (i, j, k) in keys,
+    # the EXTLOCS positions of i and j and the position of k in vehs,
+    # the vehicles in the order they first appear in keys
+    vehs = list(dict.fromkeys([k for (i, j, k) in keys]))
+    block = dict([(k, b) for b, k in enumerate(vehs)])
+    tails = np.array([vrp.index[i] for (i, j, k) in keys], dtype=np.int64)
+    heads = np.array([vrp.index[j] for (i, j, k) in keys], dtype=np.int64)
+    blocks = np.array([block[k] for (i, j, k) in keys], dtype=np.int64)
+    return tails, heads, blocks, vehs
+
+def get_subtours(vrp, tails, heads, blocks, selected):
+    # returns: list of arrays, one for every connected component of a
+    # vehicle's selected arcs that is a subtour missing 'O', holding
+    # the positions of its arcs in the get_arc_layout arrays
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    arcs = np.flatnonzero(selected)
+    if len(arcs) == 0:
+        return []
+    n = len(vrp.EXTLOCS)
+    size = (int(blocks[arcs].max()) + 1) * n
+    # One block of EXTLOCS per vehicle, so each vehicle's components are separate
+    t = blocks[arcs] * n + tails[arcs]
+    h = blocks[arcs] * n + heads[arcs]
+    graph = coo_matrix((np.ones(len(arcs)), (t, h)), shape=(size, size))
+    ncomps, labels = connected_components(graph, directed=False)
+
+    # A component with as many arcs as nodes is a cycle, which is a subtour unless it visits 'O'
+    arcLabels = labels[t]
+    touched = np.zeros(size, dtype=bool)
+    touched[t] = True
+    touched[h] = True
+    numArcs = np.bincount(arcLabels, minlength=ncomps)
+    numNodes = np.bincount(labels[touched], minlength=ncomps)
+    depots = np.zeros(ncomps, dtype=bool)
+    depots[labels[np.arange(0, size, n) + vrp.index['O']]] = True
+    subtours = np.flatnonzero((numArcs > 0) & (numArcs == numNodes) & ~depots)
+    return [arcs[arcLabels == c] for c in subtours]
+
+def get_cutsets(vrp, weights, required, tol):
+    # returns: list of (S, t) where S is a set of locations without 'O'
+    # and the total weight of the arcs crossing S (in either direction)
+    # is below required[t] - tol for the t in S it was separated for.
+    # Each S comes from an 'O'-t minimum cut of the undirected support
+    # graph whose capacities are weights[i, j] + weights[j, i]
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import breadth_first_order, maximum_flow
+
+    n = len(vrp.EXTLOCS)
+    tails = np.array([vrp.index[i] for (i, j) in weights], dtype=np.int64)
+    heads = np.array([vrp.index[j] for (i, j) in weights], dtype=np.int64)
+    caps = np.rint(np.array(list(weights.values())) * FLOWSCALE).astype(np.int64)
+    keep = caps > 0
+    graph = coo_matrix((np.concatenate((caps[keep], caps[keep])),
+                        (np.concatenate((tails[keep], heads[keep])),
+                         np.concatenate((heads[keep], tails[keep])))),
+                       shape=(n, n)).tocsr().astype(np.int32)
+    graph.sum_duplicates()
+    source = vrp.index['O']
+
+    cutsets = []
+    covered = set()
+    for t in vrp.LOCS:
+        # Skip customers already inside a violated set or not needing a cut
+        if t in covered or required.get(t, 0) <= tol:
+            continue
+        flow = maximum_flow(graph, source, vrp.index[t])
+        if flow.flow_value >= (required[t] - tol) * FLOWSCALE:
+            continue
+        # The source side of the cut is everything reachable from 'O' in the residual graph
+        residual = graph - flow.flow
+        residual.data = (residual.data > 0).astype(np.int32)
+        residual.eliminate_zeros()
+        reachable = set(breadth_first_order(residual, source, return_predecessors=False))
+        S = set([i for i in vrp.LOCS if vrp.index[i] not in reachable])
+        covered |= S
+        cutsets.append((S, t))
+
+    return cutsets
+
+def get_capacity_sets(vrp, weights, tol):
+    # returns: list of (S, rhs) where S is a set of customers and the
+    # total weight of the arcs crossing S (in either direction) is below
+    # rhs - tol, rhs = 2 * ceil(d(S) / capacity) being the right-hand
+    # side of its rounded capacity inequality. The sets are the connected
+    # components of the support graph without 'O', and the most violated
+    # set met while greedily growing a set from each node of the support
+    # graph with its edges of weight 1 shrunk, always adding the node
+    # most strongly joined to the set
+    from scipy.sparse import coo_matrix, csr_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    n = len(vrp.LOCS)
+    if n == 0:
+        return []
+    depot = vrp.index['O']
+    tails = np.array([vrp.index[i] for (i, j) in weights], dtype=np.int64)
+    heads = np.array([vrp.index[j] for (i, j) in weights], dtype=np.int64)
+    x = np.array(list(weights.values()), dtype=np.float64)
+    # Weights of the undirected edges between customers, and of every edge at each customer
+    inside = (tails != depot) & (heads != depot) & (x > tol)
+    edges = coo_matrix((np.concatenate((x[inside], x[inside])),
+                        (np.concatenate((tails[inside], heads[inside])),
+                         np.concatenate((heads[inside], tails[inside])))),
+                       shape=(n, n)).toarray()
+    degree = (np.bincount(tails[tails != depot], x[tails != depot], minlength=n)[:n] +
+              np.bincount(heads[heads != depot], x[heads != depot], minlength=n)[:n])
+    # EXTLOCS puts the customers in positions 0, ..., n - 1
+    demand = np.array([vrp.demand[i] for i in vrp.LOCS], dtype=np.float64)
+
+    found = {}
+    def check(members):
+        # x(delta(S)) is the weight at S's nodes less twice that of the edges inside S
+        S = frozenset(members.tolist())
+        if S in found:
+            return
+        rhs = 2 * int(np.ceil(demand[members].sum() / vrp.capacity - tol))
+        if degree[members].sum() - edges[np.ix_(members, members)].sum() < rhs - tol:
+            found[S] = rhs
+
+    ncomps, labels = connected_components(csr_matrix(edges), directed=False)
+    for c in range(ncomps):
+        check(np.flatnonzero(labels == c))
+
+    # Customers joined by an edge of weight 1 are on the same route, so they are shrunk into one node
+    nsuper, owner = connected_components(csr_matrix(edges >= 1 - tol), directed=False)
+    members = [np.flatnonzero(owner == s) for s in range(nsuper)]
+    shrunk = np.zeros((nsuper, nsuper))
+    np.add.at(shrunk, (owner[:, None], owner[None, :]), edges)
+    np.fill_diagonal(shrunk, 0.0)
+    superDegree = np.bincount(owner, degree, minlength=nsuper)
+    superDemand = np.bincount(owner, demand, minlength=nsuper)
+    # Each shrunk node's edges inside it, counted from both ends
+    superInside = np.array([edges[np.ix_(m, m)].sum() for m in members])
+
+    for s in range(nsuper):
+        inS = np.zeros(nsuper, dtype=bool)
+        inS[s] = True
+        joined = shrunk[s].copy()
+        cut = superDegree[s] - superInside[s]
+        load = superDemand[s]
+        best, bestSlack = None, tol
+        while True:
+            rhs = 2 * np.ceil(load / vrp.capacity - tol)
+            if rhs - cut > bestSlack:
+                best, bestSlack = inS.copy(), rhs - cut
+            joined[inS] = -1.0
+            t = int(np.argmax(joined))
+            if joined[t] <= tol:
+                break
+            # Adding t takes its edges into S out of the cut
+            cut += superDegree[t] - superInside[t] - 2 * joined[t]
+            load += superDemand[t]
+            inS[t] = True
+            joined += shrunk[t]
+        if best is not None:
+            check(np.concatenate([members[u] for u in np.flatnonzero(best)]))
+
+    return [(set([vrp.LOCS[a] for a in S]), rhs) for S, rhs in found.items()]
+
+def get_infeasible_paths(vrp, weights, tol, max_arcs=6):
+    # returns: list of paths, tuples of locations no route can visit in
+    # that order within their time windows, whose arcs have a total
+    # weight above the number of arcs less 1, so the infeasible path
+    # inequality x(A(P)) <= |A(P)| - 1 is violated by more than tol.
+    # The paths are found by a depth-first search from every location
+    # along the arcs of positive weight, stopped at the first location
+    # the path reaches too late, at max_arcs arcs, or once the weight its
+    # arcs are missing reaches 1. Only the first location may be 'O'
+    early, late, service = window_arrays(vrp)
+    index = vrp.index
+    succ = dict([(i, []) for i in vrp.EXTLOCS])
+    for (i, j), x in weights.items():
+        if x > tol:
+            succ[i].append((j, x))
+
+    paths = []
+    def extend(path, t, missing):
+        i = index[path[-1]]
+        for j, x in succ[path[-1]]:
+            if j in path:
+                continue
+            m = missing + 1 - x
+            if m >= 1 - tol:
+                continue
+            arrive = max(early[index[j]], t + service[i] + vrp.distmat[i, index[j]])
+            if arrive > late[index[j]] + tol:
+                paths.append(path + (j,))
+            elif j != 'O' and len(path) < max_arcs:
+                extend(path + (j,), arrive, m)
+
+    for i in vrp.EXTLOCS:
+        extend((i,), early[index[i]], 0.0)
+    return paths
+
+
+def get_neighbour_arcs(vrp, k):
+    # returns: the arcs between each customer and its k nearest customers,
+    # in both directions, plus every arc to and from 'O', in EXTLOCS order.
+    # The neighbours come from a KD-tree over the coordinates, or from the
+    # rows of distmat if the problem was only given by distances
+    from scipy.spatial import cKDTree
+
+    n = len(vrp.LOCS)
+    k = min(k, n - 1)
+    pairs = set()
+    if k > 0:
+        if vrp.x is not None and vrp.y is not None:
+            points = np.array([(vrp.x[i], vrp.y[i]) for i in vrp.LOCS], dtype=np.float64)
+            near = cKDTree(points).query(points, k + 1)[1]
+        else:
+            # EXTLOCS puts the customers in rows 0, ..., n - 1 of distmat
+            dist = np.nan_to_num(vrp.distmat[:n, :n], nan=np.inf)
+            near = np.argpartition(dist, k, axis=1)[:, :k + 1]
+        for a, row in enumerate(near.tolist()):
+            for b in row:
+                if a != b:
+                    pairs.add((a, b))
+                    pairs.add((b, a))
+    depot = vrp.index['O']
+    for a in range(n):
+        pairs.add((depot, a))
+        pairs.add((a, depot))
+    return [(vrp.EXTLOCS[a], vrp.EXTLOCS[b]) for a, b in sorted(pairs)]
+
+
+def get_arc_prices(vrp, arcs, allowed=None, tol=1e-9):
+    # Prices every arc against the LP relaxation of the routing models
+    # with only each customer entered and left once, at most len(VEHS)
+    # vehicles leaving and re-entering 'O' (all of them if allused) and
+    # the cutsets x(delta(S)) >= 2 it separates with get_cutsets. Arcs
+    # with negative reduced cost are added to the ones given until the
+    # relaxation is optimal over every arc, or every allowed arc if given.
+    # returns: (bound, redcosts) with the relaxation's objective, a lower
+    # bound on any route solution, and an EXTLOCS x EXTLOCS array of
+    # reduced costs; any solution using arc (i, j) costs at least
+    # bound + redcosts[index[i], index[j]]. (None, None) if infeasible
+    from scipy.optimize import linprog
+    from scipy.sparse import csr_matrix, vstack
+
+    n = len(vrp.EXTLOCS)
+    m = n - 1
+    depot = vrp.index['O']
+    nveh = len(vrp.VEHS)
+    dist = np.nan_to_num(vrp.distmat, nan=np.inf)
+    usable = np.isfinite(dist) & ~np.eye(n, dtype=bool)
+    if allowed is not None:
+        mask = np.zeros((n, n), dtype=bool)
+        for (i, j) in allowed:
+            mask[vrp.index[i], vrp.index[j]] = True
+        usable &= mask
+    tails, heads = np.nonzero(usable)
+    cols = np.arange(len(tails))
+    cost = dist[tails, heads]
+    selected = np.zeros((n, n), dtype=bool)
+    for (i, j) in arcs:
+        selected[vrp.index[i], vrp.index[j]] = True
+    selected = selected[tails, heads]
+
+    # Rows 0, ..., m - 1 enter each customer, rows m, ..., 2m - 1 leave it, row 2m balances 'O'
+    # and row 2m + 1 counts the vehicles, over the columns of every usable arc
+    intoCust = heads != depot
+    outCust = tails != depot
+    fromDepot = tails == depot
+    toDepot = heads == depot
+    rows = np.concatenate((heads[intoCust], m + tails[outCust], np.full(fromDepot.sum(), 2 * m),
+                           np.full(toDepot.sum(), 2 * m), np.full(fromDepot.sum(), 2 * m + 1)))
+    coefs = np.concatenate((np.ones(intoCust.sum() + outCust.sum() + fromDepot.sum()),
+                            -np.ones(toDepot.sum()), np.ones(fromDepot.sum())))
+    degree = csr_matrix((coefs, (rows, np.concatenate((cols[intoCust], cols[outCust], cols[fromDepot],
+                                                       cols[toDepot], cols[fromDepot])))),
+                        shape=(2 * m + 2, len(tails)))
+    rhs = np.concatenate((np.ones(2 * m), [0.0, nveh]))
+    # With every vehicle in use the fleet row is an equation, otherwise an upper bound
+    neq = 2 * m + 2 if vrp.allused else 2 * m + 1
+    A_eq, b_eq = degree[:neq], rhs[:neq]
+    A_ub, b_ub = degree[neq:], rhs[neq:]
+
+    cutsets = set()
+    while True:
+        sel = np.flatnonzero(selected)
+        res = linprog(cost[sel], A_ub=A_ub[:, sel] if A_ub.shape[0] else None,
+                      b_ub=b_ub if A_ub.shape[0] else None,
+                      A_eq=A_eq[:, sel], b_eq=b_eq, method='highs')
+
+        if res.status != 0:
+            # Without a feasible relaxation there are no duals to price with, so try every arc
+            if selected.all():
+                return None, None
+            selected[:] = True
+            continue
+
+        # Reduced costs of every usable arc from the duals of the rows
+        redcost = cost - A_eq.T @ res.eqlin.marginals
+        if A_ub.shape[0]:
+            redcost -= A_ub.T @ res.ineqlin.marginals
+        priced = ~selected & (redcost < -tol)
+        if priced.any():
+            selected |= priced
+            continue
+
+        # Cutsets the relaxation violates become x(delta(S)) >= 2, written as -x(delta(S)) <= -2
+        weights = dict([((vrp.EXTLOCS[tails[c]], vrp.EXTLOCS[heads[c]]), x)
+                        for c, x in zip(sel.tolist(), res.x.tolist()) if x > tol])
+        found = [frozenset(S) for S, t in get_cutsets(vrp, weights, dict([(t, 2) for t in vrp.LOCS]),
+                                                      1e-6)]
+        found = [S for S in found if S not in cutsets]
+        if not found:
+            redcosts = np.full((n, n), np.inf)
+            redcosts[tails, heads] = redcost
+            return res.fun, redcosts
+        for S in found:
+            cutsets.add(S)
+            inS = np.zeros(n, dtype=bool)
+            inS[[vrp.index[i] for i in S]] = True
+            crossing = (inS[tails] != inS[heads]).astype(np.float64)
+            A_ub = vstack((A_ub, csr_matrix(-crossing))).tocsr()
+            b_ub = np.append(b_ub, -2.0)
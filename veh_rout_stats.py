@@ -0,0 +1,102 @@
+import cProfile
+import pstats
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Instrumentation levels, set with the "Stats" option
+OFF = 0  # Nothing is recorded
+STATS = 1  # Calls, times and what each callback returns are recorded
+TRACE = 2  # Every cut and feasibility check is printed too, with a summary after the solve
+
+
+class CallbackStats:
+    """Call counts, cumulative and longest call times, the number of
+    cuts, columns or solutions returned and the time spent reading the
+    LP solution, for each Dippy callback of one solve. Recording is
+    gated by level, and the solve can be run under cProfile."""
+
+    def __init__(self, level=STATS):
+        self.level = level
+        self.callbacks = {}
+        self.profile = None
+
+    def entry(self, name):
+        # The record of callback name, created when it is first called
+        if name not in self.callbacks:
+            self.callbacks[name] = {"Calls": 0, "Time": 0.0, "MaxTime": 0.0, "Returned": 0, "Extraction": 0.0}
+        return self.callbacks[name]
+
+    def record(self, name, elapsed, returned=0):
+        entry = self.entry(name)
+        entry["Calls"] += 1
+        entry["Time"] += elapsed
+        entry["MaxTime"] = max(entry["MaxTime"], elapsed)
+        entry["Returned"] += returned
+
+    @contextmanager
+    def extracting(self, name):
+        # Times reading the LP solution inside callback name
+        if self.level < STATS:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.entry(name)["Extraction"] += time.perf_counter() - start
+
+    def log(self, *args):
+        # Prints the event only when tracing
+        if self.level >= TRACE:
+            print(*args)
+
+    def report(self, *args):
+        # Prints a message about the whole formulation or solve unless instrumentation is off
+        if self.level >= STATS:
+            print(*args)
+
+    def run_profiled(self, func, *args, path=None):
+        # Calls func under cProfile, keeping the pstats.Stats and saving them to path if given
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args)
+        finally:
+            self.profile = pstats.Stats(profiler)
+            if path is not None:
+                self.profile.dump_stats(path)
+
+    def as_dict(self):
+        # The records with the mean time per call added
+        return dict([(name, dict(entry, MeanTime=entry["Time"] / entry["Calls"] if entry["Calls"] else 0.0))
+                     for name, entry in self.callbacks.items()])
+
+    def summary(self):
+        lines = ["{:<22} {:>7} {:>9} {:>9} {:>9} {:>9} {:>8}".format(
+            "Callback", "Calls", "Total s", "Mean ms", "Max ms", "Read s", "Returned")]
+        for name, entry in sorted(self.as_dict().items()):
+            lines.append("{:<22} {:>7} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>8}".format(
+                name, entry["Calls"], entry["Time"], 1000 * entry["MeanTime"], 1000 * entry["MaxTime"],
+                entry["Extraction"], entry["Returned"]))
+        return "\n".join(lines)
+
+
+def instrumented(count=None):
+    # Decorates a Dippy callback taking the problem first so prob.stats records each call,
+    # using count(result) as the number of things the call returned
+    def decorate(func):
+        @wraps(func)
+        def wrapper(prob, *args):
+            stats = getattr(prob, "stats", None)
+            if stats is None or stats.level < STATS:
+                return func(prob, *args)
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(prob, *args)
+                return result
+            finally:
+                returned = count(result) if count is not None and result is not None else 0
+                stats.record(func.__name__, time.perf_counter() - start, returned)
+        return wrapper
+    return decorate
@@ -1,10 +1,10 @@
 """This is a test module which runs your ???????_veh_rout_func.py code
-and reports back the result. There are 10 problems in total.
+and reports back the result. There are 24 problems in total.
 
 In order to verify whether or not your code works, place this file,
 veh_rout_test.py inside your directory so that it neighbours and can
 import from ???????_veh_rout_func.py locally. Then run the code via
-conda. If you obtain no errors, this means that for all ten problems,
+conda. If you obtain no errors, this means that for all the problems,
 your code worked.
 
 If you wish to test your own problems as well, you can use
@@ -14,10 +14,27 @@ in fact the optimal solution, then you can use check_vehicle_router(...)
 to test the results. Read the function documentation for more
 information.
 
+The problems run in parallel, one process per problem, with
+
+    python veh_rout_test.py [tests...] [--workers N] [--timeout S]
+        [--report FILE]
+
+A problem still running after the timeout is killed and reported as
+such, and the report is a JSON file with the status, solve time and
+objective of each problem. With --cache FILE, problems already solved
+with the same options are read back from that SolutionCache instead.
+
 Author: Elliot Paton-Simpson
 """
 
 # Import builtins.
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
 from random import random, seed
 from typing import Dict, List, Optional, Tuple, Union
 
@@ -26,10 +43,254 @@ import coinor.dippy as dippy
 from pulp import LpVariable
 
 # Import locally.
-from veh_rout_prob import VRProb
-from epat261_veh_rout_func import (
-    formulate, get_assignments, myopts, solve, solve_and_display
-)  # TODO: replace epat261 with UPI
+from veh_rout_cache import SolutionCache
+from veh_rout_cbc import read_nodes
+from veh_rout_prob import VRProb, get_capacity_sets
+from veh_rout_pre import capacity_arcs
+from crou060_veh_rout_func import (
+    formulate, get_assignments, is_solution_feasible, myopts, reoptimize,
+    solution_routes, solve, solve_and_display
+)
+
+
+# The end of a CBC log that enumerated nodes, and of one that found the
+# model infeasible before enumerating any, for check_read_nodes.
+CBC_LOGS = {
+    2: """Cbc0035I Maximum depth 1, 0 variables fixed on reduced cost
+Cuts at root node changed objective from 3.375 to 3.375
+
+Result - Optimal solution found
+
+Objective value:                4.00000000
+Enumerated nodes:               2
+Total iterations:               2
+Time (CPU seconds):             0.00
+Time (Wallclock seconds):       0.00
+""",
+    0: """Continuous objective value is 0.5 - 0.00 seconds
+Cgl0000I Cut generators found to be infeasible! (or unbounded)
+Pre-processing says infeasible or unbounded
+Option for printingOptions changed from normal to all
+""",
+}
+
+# The problems, as the keyword arguments of check_vehicle_router, or of
+# the function named by 'check', which returns the objective it found.
+TESTS = {
+    # Test 1
+    1: dict(
+        arcs=[[(2, 1), (5, 2), (1, 3), (3, 4), ('O', 5), (4, 'O')]],
+        num_locations=5
+    ),
+    # Test 2
+    2: dict(
+        arcs=[[
+            (1, 2), (2, 6), (3, 'O'), (4, 8), (5, 4), (6, 3), (7, 1),
+            (8, 9), (9, 10), (10, 7), ('O', 5)
+        ]],
+        num_locations=10
+    ),
+    # Test 3
+    3: dict(
+        arcs=[
+            [(3, 6), (6, 'O'), ('O', 3)],
+            [
+                (10, 9), (1, 7), (2, 1), (4, 5), (5, 'O'), (7, 10), (8, 4),
+                (9, 8), ('O', 2)
+            ]
+        ],
+        num_vehicles=2,
+        num_locations=10,
+        use_all_vehicles=True
+    ),
+    # Test 4
+    4: dict(
+        arcs=[[
+            (1, 4), (2, 6), (3, 8), (4, 'O'), (5, 3), (6, 1), (7, 2), (8, 7),
+            ('O', 5)
+        ]],
+        num_locations=8,
+        num_vehicles=3,
+        seed_n=1
+    ),
+    # Test 5
+    5: dict(
+        arcs=[],
+        num_locations=8,
+        num_vehicles=2,
+        max_dist=10
+    ),
+    # Test 6
+    6: dict(
+        arcs=[
+            [(1, 2), (2, 7), (3, 6), (6, 'O'), (7, 3), ('O', 1)],
+            [(4, 'O'), (5, 8), (8, 4), ('O', 5)],
+        ],
+        num_locations=8,
+        num_vehicles=2,
+        max_dist=20
+    ),
+    # Test 7
+    7: dict(
+        arcs=[
+            [
+                ('O', 2), (2, 11), (11, 1), (1, 7), (7, 10), (10, 5), (5, 4),
+                (4, 6), (6, 9), (9, 'O')
+            ],
+            [('O', 3), (3, 13), (13, 8), (8, 'O')],
+            [('O', 12), (12, 'O')]
+        ],
+        num_locations=13,
+        num_vehicles=3,
+        use_all_vehicles=True,
+        max_dist=25
+    ),
+    # Test 8 – this one might take a while.
+    8: dict(
+        arcs=[
+            [(12, 3), (13, 8), (3, 13), (8, 'O'), ('O', 12)],
+            [
+                (10, 5), (11, 1), (1, 7), (2, 11), (4, 6), (5, 4), (6, 9),
+                (7, 10), (9, 'O'), ('O', 2)
+            ],
+        ],
+        num_locations=13,
+        num_vehicles=3,
+        max_dist=25
+    ),
+    # Test 9
+    9: dict(
+        arcs=[
+            [(1, 5), (2, 1), (4, 'O'), (5, 4), ('O', 2)],
+            [(3, 'O'), ('O', 3)],
+            [(6, 'O'), ('O', 6)]
+        ],
+        num_locations=6,
+        num_vehicles=3,
+        use_all_vehicles=True
+    ),
+    # Test 10
+    10: dict(
+        arcs=[
+            [(1, 6), (2, 4), (3, 5), (4, 3), (5, 'O'), (6, 2), ('O', 1)]
+        ],
+        num_locations=6,
+        num_vehicles=3,
+        seed_n=5
+    ),
+    # Test 11 – re-optimising after adding customers.
+    11: dict(
+        check='check_reoptimize',
+        delta={'Add': {'a': (2.0, 8.0), 'b': (9.0, 1.0)}},
+        num_locations=6,
+        num_vehicles=2
+    ),
+    # Test 12 – re-optimising after removing customers.
+    12: dict(
+        check='check_reoptimize',
+        delta={'Remove': [2, 5]},
+        num_locations=8,
+        num_vehicles=2,
+        max_dist=20
+    ),
+    # Test 13 – re-optimising after tightening the distance cap.
+    13: dict(
+        check='check_reoptimize',
+        delta={'MaxDist': 15},
+        num_locations=8,
+        num_vehicles=3,
+        max_dist=25
+    ),
+    # Test 14 – test 6 with CBC, cutting off subtours as they are found.
+    14: dict(
+        arcs=[
+            [(1, 2), (2, 7), (3, 6), (6, 'O'), (7, 3), ('O', 1)],
+            [(4, 'O'), (5, 8), (8, 4), ('O', 5)],
+        ],
+        num_locations=8,
+        num_vehicles=2,
+        max_dist=20,
+        options={'Backend': 'CBC', 'Subtours': 'Cuts'}
+    ),
+    # Test 15 – test 6 with CBC and the compact MTZ formulation.
+    15: dict(
+        arcs=[
+            [(1, 2), (2, 7), (3, 6), (6, 'O'), (7, 3), ('O', 1)],
+            [(4, 'O'), (5, 8), (8, 4), ('O', 5)],
+        ],
+        num_locations=8,
+        num_vehicles=2,
+        max_dist=20,
+        options={'Backend': 'CBC', 'Subtours': 'MTZ'}
+    ),
+    # Test 16 – test 3 with CBC and the compact flow formulation.
+    16: dict(
+        arcs=[
+            [(3, 6), (6, 'O'), ('O', 3)],
+            [
+                (10, 9), (1, 7), (2, 1), (4, 5), (5, 'O'), (7, 10), (8, 4),
+                (9, 8), ('O', 2)
+            ]
+        ],
+        num_vehicles=2,
+        num_locations=10,
+        use_all_vehicles=True,
+        options={'Backend': 'CBC', 'Subtours': 'Flow'}
+    ),
+    # Test 17 – reading the node count from CBC's log.
+    17: dict(
+        check='check_read_nodes'
+    ),
+    # Test 18 – three customers at most to a vehicle.
+    18: dict(
+        arcs=[
+            [('O', 1), (1, 7), (7, 2), (2, 'O')],
+            [('O', 3), (3, 6), (6, 'O')],
+            [('O', 4), (4, 8), (8, 5), (5, 'O')]
+        ],
+        num_locations=8,
+        num_vehicles=3,
+        capacity=3
+    ),
+    # Test 19 – test 18 with the two-index formulation, whose routes
+    # only rounded capacity cuts keep within the capacity.
+    19: dict(
+        arcs=[
+            [('O', 1), (1, 7), (7, 2), (2, 'O')],
+            [('O', 3), (3, 6), (6, 'O')],
+            [('O', 4), (4, 8), (8, 5), (5, 'O')]
+        ],
+        num_locations=8,
+        num_vehicles=3,
+        capacity=3,
+        options={'Formulation': 'TwoIndex'}
+    ),
+    # Test 20 – rounded capacity cuts rejecting an overloaded route.
+    20: dict(
+        check='check_capacity_cuts',
+        num_locations=8,
+        num_vehicles=3,
+        capacity=3
+    ),
+    # Test 21 – a customer no vehicle can carry the demand of.
+    21: dict(
+        check='check_overloaded'
+    ),
+    # Tests 22 to 24 – time windows only the depot's arcs make
+    # infeasible, with each way of ruling out subtours.
+    22: dict(
+        check='check_depot_windows',
+        subtours='Cuts'
+    ),
+    23: dict(
+        check='check_depot_windows',
+        subtours='MTZ'
+    ),
+    24: dict(
+        check='check_depot_windows',
+        subtours='Flow'
+    ),
+}
 
 
 class DipProblemExtended(dippy.DipProblem):
@@ -40,17 +301,16 @@ class DipProblemExtended(dippy.DipProblem):
     use_vars: Dict[int, LpVariable]
 
 
-def vehicle_router(
+def make_problem(
         num_locations: int,
         num_vehicles: int = 1,
         max_dist: Optional[float] = None,
         use_all_vehicles: bool = False,
         seed_n: int = 0,
-        display: bool = False
-) -> Optional[Dict[int, List[Union[str, int]]]]:
+        capacity: Optional[int] = None
+) -> VRProb:
     """
-    Tests the vehicle routing problem with a number of parameters and
-    returns the variables.
+    Generates the seeded random problem that vehicle_router solves.
     :param int num_locations: The number of locations besides the depot.
     :param int num_vehicles: The number of vehicles available for
         travel.
@@ -60,18 +320,11 @@ def vehicle_router(
         leave the depot.
     :param int seed_n: The random seed number. Affects the coordinate
         generation.
-    :param bool display: Whether to display the solution to the problem.
-    :rtype: Optional[Tuple[List[
-            Tuple[Union[str, int], Union[int, str], int]
-        ], List[int]]]
-    :rtype: Optional[Dict[int, List[Union[str, int]]]]
-    :return: If the problem is not solved, returns None. Otherwise,
-        returns a dictionary with vehicle numbers for keys and lists
-        of arcs for values, where each lists contains
+    :param Optional[int] capacity: The number of customers a vehicle
+        can serve, each needing one unit of its load.
+    :rtype: VRProb
+    :return: The problem, with the depot at the centre.
     """
-    # Gets the tolerance for the problem.
-    tol = myopts['Tol']
-
     # Generates each of the different locations.
     locations = list(range(1, num_locations + 1))
 
@@ -86,23 +339,73 @@ def vehicle_router(
     x['O'] = 5
     y['O'] = 5
 
-    # Initializes and formulates the linear program.
-    vrp = VRProb(
+    return VRProb(
         LOCS=locations, ncurr=num_vehicles, x=x, y=y, maxdist=max_dist,
-        useall=use_all_vehicles
+        useall=use_all_vehicles, capacity=capacity
+    )
+
+
+def vehicle_router(
+        num_locations: int,
+        num_vehicles: int = 1,
+        max_dist: Optional[float] = None,
+        use_all_vehicles: bool = False,
+        seed_n: int = 0,
+        capacity: Optional[int] = None,
+        display: bool = False,
+        options: Optional[Dict] = None,
+        cache: Optional[SolutionCache] = None
+) -> Optional[Dict[int, List[Union[str, int]]]]:
+    """
+    Tests the vehicle routing problem with a number of parameters and
+    returns the variables.
+    :param int num_locations: The number of locations besides the depot.
+    :param int num_vehicles: The number of vehicles available for
+        travel.
+    :param Optional[float] max_dist: The maximum distance a vehicle can
+        travel.
+    :param bool use_all_vehicles: Whether or not every vehicle must
+        leave the depot.
+    :param int seed_n: The random seed number. Affects the coordinate
+        generation.
+    :param Optional[int] capacity: The number of customers a vehicle
+        can serve.
+    :param bool display: Whether to display the solution to the problem.
+    :param Optional[Dict] options: Options to solve with in place of
+        those in myopts, e.g. the Backend and Subtours.
+    :param Optional[SolutionCache] cache: Where to look up and keep the
+        solution, so a problem already solved is not solved again.
+    :rtype: Optional[Tuple[List[
+            Tuple[Union[str, int], Union[int, str], int]
+        ], List[int]]]
+    :rtype: Optional[Dict[int, List[Union[str, int]]]]
+    :return: If the problem is not solved, returns None. Otherwise,
+        returns a dictionary with vehicle numbers for keys and lists
+        of arcs for values, where each lists contains
+    """
+    # Gets the tolerance and options for the problem.
+    options = dict(myopts, **(options or {}))
+    tol = options['Tol']
+    if cache is not None:
+        options['Cache'] = cache
+
+    # Initializes and formulates the linear program.
+    vrp = make_problem(
+        num_locations, num_vehicles, max_dist, use_all_vehicles, seed_n,
+        capacity
     )
-    prob: dippy.DipProblem = formulate(vrp, options=myopts)
+    prob: dippy.DipProblem = formulate(vrp, options=options)
 
     # Solve the problem and display the result.
     if display:
-        solution = solve_and_display(prob, options=myopts)
+        solution = solve_and_display(prob, options=options)
         if solution:
             vrp.setSolution(get_assignments(prob, solution, tol), tol)
             vrp.displaySolution(title="Solution")
 
     # Solve the problem without rendering the result.
     else:
-        solution = solve(prob, options=myopts)
+        solution = solve(prob, options=options)
 
     # Returns None if no solution was found
     if solution is None:
@@ -131,7 +434,10 @@ def check_vehicle_router(
         max_dist: Optional[float] = None,
         use_all_vehicles: bool = False,
         seed_n: int = 0,
-        display: bool = False
+        capacity: Optional[int] = None,
+        display: bool = False,
+        options: Optional[Dict] = None,
+        cache: Optional[SolutionCache] = None
 ) -> None:
     """
     Checks the output from the vehicle_router function.
@@ -147,15 +453,37 @@ def check_vehicle_router(
         leave the depot.
     :param int seed_n: The random seed number. Affects the coordinate
         generation.
+    :param Optional[int] capacity: The number of customers a vehicle
+        can serve.
     :param bool display: Whether to display the solution to the problem.
+    :param Optional[Dict] options: Options to solve with in place of
+        those in myopts.
+    :param Optional[SolutionCache] cache: Where to look up and keep the
+        solution.
     :return: None
     """
     # Obtains the result for the linear program.
     result = vehicle_router(
         num_locations, num_vehicles, max_dist, use_all_vehicles, seed_n,
-        display
+        capacity, display, options, cache
     )
+    compare_routes(arcs, result)
+
 
+def compare_routes(
+        arcs: List[List[Tuple[Union[str, int], Union[str, int]]]],
+        result: Optional[Dict[int, List[Union[str, int]]]]
+) -> None:
+    """
+    Checks the result of vehicle_router against the routes expected,
+    raising a ValueError if they differ.
+    :param List[List[Tuple[Union[int, str], Union[int, str]]]] arcs: A
+        list of each vehicle's route, where each vehicle has a list
+        containing each arc.
+    :param Optional[Dict[int, List[Union[str, int]]]] result: The
+        output of vehicle_router.
+    :return: None
+    """
     # Special case if the problem is not feasible.
     if not result:
         if not arcs:
@@ -192,114 +520,351 @@ def check_vehicle_router(
             raise ValueError(f"Unexpected tour: {route}.")
 
 
-if __name__ == '__main__':
-    # Test 1
-    check_vehicle_router(
-        arcs=[[(2, 1), (5, 2), (1, 3), (3, 4), ('O', 5), (4, 'O')]],
-        num_locations=5
+def check_reoptimize(
+        delta: Dict,
+        num_locations: int,
+        num_vehicles: int = 1,
+        max_dist: Optional[float] = None,
+        use_all_vehicles: bool = False,
+        seed_n: int = 0,
+        cache: Optional[SolutionCache] = None
+) -> Optional[float]:
+    """
+    Checks that re-optimising a solved problem after a change finds the
+    same objective as solving the changed problem from scratch, and that
+    a problem never solved can't be re-optimised without options.
+    :param Dict delta: The change, as VRProb.applyDelta takes it.
+    :param int num_locations: The number of locations besides the depot.
+    :param int num_vehicles: The number of vehicles available for
+        travel.
+    :param Optional[float] max_dist: The maximum distance a vehicle can
+        travel.
+    :param bool use_all_vehicles: Whether or not every vehicle must
+        leave the depot.
+    :param int seed_n: The random seed number. Affects the coordinate
+        generation.
+    :param Optional[SolutionCache] cache: Unused, as re-optimising is
+        never cached.
+    :rtype: Optional[float]
+    :return: The objective of the changed problem, None if infeasible.
+    """
+    vrp = make_problem(
+        num_locations, num_vehicles, max_dist, use_all_vehicles, seed_n
     )
+    prob = formulate(vrp, options=myopts)
+    try:
+        reoptimize(prob, delta)
+    except ValueError:
+        pass
+    else:
+        raise ValueError("Re-optimised a problem that was never solved.")
+
+    # Re-optimises the solved problem, then solves the change cold.
+    solve(prob, options=myopts)
+    reoptimized = reoptimize(prob, delta)
+    cold = formulate(vrp.applyDelta(delta), options=myopts)
+    solution = solve(cold, options=myopts)
+    if (reoptimized is None) != (solution is None):
+        raise ValueError(
+            f"Re-optimising found {'no' if reoptimized is None else 'a'} "
+            f"solution, solving cold found "
+            f"{'no' if solution is None else 'a'} solution."
+        )
+    if solution is None:
+        return None
+    if abs(prob.objective.value() - cold.objective.value()) > myopts['Tol']:
+        raise ValueError(
+            f"Re-optimised objective {prob.objective.value()}, "
+            f"expected {cold.objective.value()}."
+        )
+    return cold.objective.value()
 
-    # Test 2
-    check_vehicle_router(
-        arcs=[[
-            (1, 2), (2, 6), (3, 'O'), (4, 8), (5, 4), (6, 3), (7, 1),
-            (8, 9), (9, 10), (10, 7), ('O', 5)
-        ]],
-        num_locations=10
+def check_read_nodes(cache: Optional[SolutionCache] = None) -> None:
+    """
+    Checks that read_nodes finds the nodes CBC enumerated in each of the
+    CBC_LOGS, and none in a log that found the model infeasible.
+    :param Optional[SolutionCache] cache: Unused.
+    :return: None
+    """
+    for nodes, log in CBC_LOGS.items():
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cbc.log')
+            with open(path, 'w') as f:
+                f.write(log)
+            if read_nodes(path) != nodes:
+                raise ValueError(
+                    f"Read {read_nodes(path)} nodes, expected {nodes}."
+                )
+
+def check_capacity_cuts(
+        num_locations: int,
+        num_vehicles: int,
+        capacity: int,
+        seed_n: int = 0,
+        cache: Optional[SolutionCache] = None
+) -> Optional[float]:
+    """
+    Checks that the routes the two-index formulation solves for are
+    within the capacity, and that a route serving every customer, which
+    is over it, is rejected and violates a rounded capacity cut.
+    :param int num_locations: The number of locations besides the depot.
+    :param int num_vehicles: The number of vehicles available for
+        travel.
+    :param int capacity: The number of customers a vehicle can serve,
+        fewer than num_locations.
+    :param int seed_n: The random seed number. Affects the coordinate
+        generation.
+    :param Optional[SolutionCache] cache: Where to look up and keep the
+        solution.
+    :rtype: Optional[float]
+    :return: The objective of the problem, None if infeasible.
+    """
+    options = dict(myopts, Formulation='TwoIndex')
+    if cache is not None:
+        options['Cache'] = cache
+    vrp = make_problem(
+        num_locations, num_vehicles, seed_n=seed_n, capacity=capacity
     )
+    prob = formulate(vrp, options=options)
 
-    # Test 3
-    check_vehicle_router(
-        arcs=[
-            [(3, 6), (6, 'O'), ('O', 3)],
-            [
-                (10, 9), (1, 7), (2, 1), (4, 5), (5, 'O'), (7, 10), (8, 4),
-                (9, 8), ('O', 2)
-            ]
-        ],
-        num_vehicles=2,
-        num_locations=10,
-        use_all_vehicles=True
+    # Solves the problem, checking each route's load.
+    if solve(prob, options=options) is None:
+        return None
+    for route in solution_routes(prob):
+        if sum(vrp.demand[i] for i in route) > capacity:
+            raise ValueError(f"Route {route} is over the capacity.")
+
+    # A single route through every customer in turn.
+    route = ['O'] + vrp.LOCS + ['O']
+    used = set(zip(route[:-1], route[1:]))
+    solution = {
+        var: float((i, j) in used) for (i, j, k), var in prob.arc_vars.items()
+    }
+    if is_solution_feasible(prob, solution, options['Tol']):
+        raise ValueError("A route over the capacity was feasible.")
+    cuts = get_capacity_sets(
+        vrp, {arc: 1.0 for arc in used}, options.get('CutTol', 1e-3)
     )
+    if not any(
+            sum((i in S) != (j in S) for (i, j) in used) < rhs
+            for S, rhs in cuts
+    ):
+        raise ValueError("No rounded capacity cut cuts off the route.")
+    return prob.objective.value()
 
-    # Test 4
-    check_vehicle_router(
-        arcs=[[
-            (1, 4), (2, 6), (3, 8), (4, 'O'), (5, 3), (6, 1), (7, 2), (8, 7),
-            ('O', 5)
-        ]],
-        num_locations=8,
-        num_vehicles=3,
-        seed_n=1
-    )
 
-    # Test 5
-    check_vehicle_router(
-        arcs=[],
-        num_locations=8,
-        num_vehicles=2,
-        max_dist=10
+def check_overloaded(cache: Optional[SolutionCache] = None) -> None:
+    """
+    Checks that a customer whose demand is over the capacity on its own
+    is reported by capacity preprocessing, and makes the problem
+    infeasible.
+    :param Optional[SolutionCache] cache: Where to look up and keep the
+        solution.
+    :return: None
+    """
+    options = dict(myopts, Cache=cache) if cache is not None else myopts
+    vrp = VRProb(
+        LOCS=[1, 2, 3], ncurr=2,
+        x={'O': 5, 1: 2, 2: 8, 3: 5}, y={'O': 5, 1: 2, 2: 3, 3: 9},
+        demand={1: 2, 2: 5, 3: 1}, capacity=4
     )
+    arcs = [(i, j) for i in vrp.EXTLOCS for j in vrp.EXTLOCS if i != j]
+    kept, report = capacity_arcs(vrp, arcs)
+    if report['Overloaded'] != [2]:
+        raise ValueError(
+            f"Customers {report['Overloaded']} are overloaded, expected [2]."
+        )
+    prob = formulate(vrp, options=options)
+    if prob.pre_stats['Overloaded'] != [2]:
+        raise ValueError(
+            f"Formulating found customers {prob.pre_stats['Overloaded']} "
+            f"overloaded, expected [2]."
+        )
+    if solve(prob, options=options) is not None:
+        raise ValueError("Problem solved. Expected it to be infeasible.")
 
-    # Test 6
-    check_vehicle_router(
-        arcs=[
-            [(1, 2), (2, 7), (3, 6), (6, 'O'), (7, 3), ('O', 1)],
-            [(4, 'O'), (5, 8), (8, 4), ('O', 5)],
-        ],
-        num_locations=8,
-        num_vehicles=2,
-        max_dist=20
+def check_depot_windows(
+        subtours: str = 'Cuts',
+        cache: Optional[SolutionCache] = None
+) -> None:
+    """
+    Checks that a time window problem only the depot's arcs make
+    infeasible is reported as such. One vehicle leaves the depot at 0
+    and must start at i by 9 and at k by 10.5, but i and j are 8.5 from
+    the depot and 3.6 from k, which is 10 from the depot, so whichever
+    of i and k it serves second is served late.
+    :param str subtours: The Subtours option to formulate with.
+    :param Optional[SolutionCache] cache: Where to look up and keep the
+        solution.
+    :return: None
+    """
+    vrp = VRProb(
+        LOCS=['i', 'j', 'k'], ncurr=1,
+        x={'O': 0, 'i': 8, 'j': 8, 'k': 10},
+        y={'O': 0, 'i': 3, 'j': 3, 'k': 0},
+        windows={'i': (0, 9), 'k': (0, 10.5)}
     )
+    options = dict(myopts, Subtours=subtours)
+    if cache is not None:
+        options['Cache'] = cache
+    prob = formulate(vrp, options=options)
+    if solve(prob, options=options) is not None:
+        raise ValueError(
+            f"Problem feasible with Subtours={subtours!r}. Expected no route."
+        )
 
-    # Test 7
-    check_vehicle_router(
-        arcs=[
-            [
-                ('O', 2), (2, 11), (11, 1), (1, 7), (7, 10), (10, 5), (5, 4),
-                (4, 6), (6, 9), (9, 'O')
-            ],
-            [('O', 3), (3, 13), (13, 8), (8, 'O')],
-            [('O', 12), (12, 'O')]
-        ],
-        num_locations=13,
-        num_vehicles=3,
-        use_all_vehicles=True,
-        max_dist=25
-    )
 
-    # Test 8 – this one might take a while.
-    check_vehicle_router(
-        arcs=[
-            [(12, 3), (13, 8), (3, 13), (8, 'O'), ('O', 12)],
-            [
-                (10, 5), (11, 1), (1, 7), (2, 11), (4, 6), (5, 4), (6, 9),
-                (7, 10), (9, 'O'), ('O', 2)
-            ],
-        ],
-        num_locations=13,
-        num_vehicles=3,
-        max_dist=25
-    )
+def _run_test(test: int, conn, verbose: bool, cache: Optional[str]) -> None:
+    # Runs one of the TESTS in a worker process and sends its result
+    # back down conn.
+    if not verbose:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+    case = dict(TESTS[test])
+    check = case.pop('check', None)
+    arcs = case.pop('arcs', None)
+    record = {'test': test, 'status': 'pass', 'message': None,
+              'time': None, 'objective': None}
+    try:
+        start = time.perf_counter()
+        if check is not None:
+            record['objective'] = globals()[check](
+                **case,
+                cache=SolutionCache(cache) if cache is not None else None
+            )
+            record['time'] = time.perf_counter() - start
+            conn.send(record)
+            conn.close()
+            return
+        options = case.pop('options', None)
+        result = vehicle_router(
+            **case, options=options,
+            cache=SolutionCache(cache) if cache is not None else None
+        )
+        record['time'] = time.perf_counter() - start
+        if result:
+            vrp = make_problem(**case)
+            record['objective'] = sum(
+                vrp.dist[i, j] for route in result.values() for (i, j) in route
+            )
+        compare_routes(arcs, result)
+    except ValueError as e:
+        record.update(status='fail', message=str(e))
+    except Exception as e:
+        record.update(status='error', message=repr(e))
+    conn.send(record)
+    conn.close()
+
+
+def run_tests(
+        tests: Optional[List[int]] = None,
+        workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        report: Optional[str] = None,
+        verbose: bool = False,
+        cache: Optional[str] = None
+) -> List[Dict]:
+    """
+    Runs TESTS in parallel, each in its own process, killing any test
+    that is still running after the timeout.
+    :param Optional[List[int]] tests: Which TESTS to run, all of them by
+        default.
+    :param Optional[int] workers: The most tests to run at once, the
+        number of CPUs by default.
+    :param Optional[float] timeout: The wall-clock seconds each test
+        gets, or None for no limit.
+    :param Optional[str] report: A file to write the results to as
+        JSON.
+    :param bool verbose: Whether to show the solver output.
+    :param Optional[str] cache: The SolutionCache file to reuse solutions
+        from, or None to solve every test.
+    :rtype: List[Dict]
+    :return: A record for each test with its status ('pass', 'fail',
+        'error' or 'timeout'), the reason it did not pass, its solve time
+        (s) and the objective of the routes found.
+    """
+    waiting = list(tests or TESTS)
+    workers = workers or os.cpu_count() or 1
+    running = {}
+    results = {}
+
+    while waiting or running:
+        # Starts tests while there are free workers.
+        while waiting and len(running) < workers:
+            test = waiting.pop(0)
+            recv, send = multiprocessing.Pipe(duplex=False)
+            proc = multiprocessing.Process(
+                target=_run_test, args=(test, send, verbose, cache),
+                daemon=True
+            )
+            proc.start()
+            send.close()
+            running[test] = (proc, recv, time.perf_counter())
+
+        # Collects finished tests and kills those out of time.
+        time.sleep(0.05)
+        for test, (proc, recv, start) in list(running.items()):
+            elapsed = time.perf_counter() - start
+            # Checked before polling, so a test that sends its result and
+            # exits in between is still read rather than taken for an error.
+            alive = proc.is_alive()
+            if recv.poll():
+                try:
+                    results[test] = recv.recv()
+                except EOFError:
+                    pass
+            if test not in results and alive:
+                if timeout is None or elapsed < timeout:
+                    continue
+                proc.terminate()
+                proc.join(1)
+                if proc.is_alive():
+                    proc.kill()
+                results[test] = {
+                    'test': test, 'status': 'timeout',
+                    'message': f"Killed after {timeout} s.", 'time': elapsed,
+                    'objective': None
+                }
+            elif test not in results:
+                results[test] = {
+                    'test': test, 'status': 'error',
+                    'message': f"Exit code {proc.exitcode}.", 'time': elapsed,
+                    'objective': None
+                }
+            proc.join()
+            recv.close()
+            del running[test]
+            record = results[test]
+            print(f"Test {test}: {record['status']}"
+                  + (f" ({record['message']})" if record['message'] else ""),
+                  flush=True)
+
+    records = [results[test] for test in sorted(results)]
+    if report is not None:
+        with open(report, 'w') as f:
+            json.dump({'workers': workers, 'timeout': timeout,
+                       'tests': records}, f, indent=2)
+    return records
 
-    # Test 9
-    check_vehicle_router(
-        arcs=[
-            [(1, 5), (2, 1), (4, 'O'), (5, 4), ('O', 2)],
-            [(3, 'O'), ('O', 3)],
-            [(6, 'O'), ('O', 6)]
-        ],
-        num_locations=6,
-        num_vehicles=3,
-        use_all_vehicles=True
-    )
 
-    # Test 10
-    check_vehicle_router(
-        arcs=[
-            [(1, 6), (2, 4), (3, 5), (4, 3), (5, 'O'), (6, 2), ('O', 1)]
-        ],
-        num_locations=6,
-        num_vehicles=3,
-        seed_n=5
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Runs the vehicle routing tests in parallel."
     )
+    parser.add_argument('tests', nargs='*', type=int,
+                        help="Which tests to run (all by default).")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="The most tests to run at once.")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="Seconds before a test is killed.")
+    parser.add_argument('--report', default=None,
+                        help="A file to write the JSON report to.")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Show the solver output.")
+    parser.add_argument('--cache', default=None,
+                        help="A solution cache file to reuse solutions from.")
+    args = parser.parse_args()
+
+    records = run_tests(args.tests, args.workers, args.timeout, args.report,
+                        args.verbose, args.cache)
+    sys.exit(0 if all(r['status'] == 'pass' for r in records) else 1)